@@ -0,0 +1,207 @@
+# --- DETECÇÃO DE ANOMALIAS EM TEMPO REAL (por canal) ---
+# Cada canal (fase x grandeza) mantém apenas estatísticas acumuladas, então
+# cada amostra custa O(1) em tempo e memória:
+#   - média/variância de Welford por faixa horária e tipo de dia (dia útil ou
+#     fim de semana; a carga do fim de semana é cerca de metade), usada só
+#     depois que a faixa cobre vários dias distintos
+#   - média/variância de Welford global, usada enquanto a faixa não está
+#     pronta, apenas para desvios abruptos
+#   - z-score da amostra contra a linha de base (desvio abrupto)
+#   - CUSUM bilateral sobre o z-score (deriva lenta), só com a faixa pronta
+# Amostras com desvio abrupto não entram na linha de base, e um canal em
+# alarme só volta a disparar depois de uma sequência de amostras normais.
+# O estado inteiro é serializável em JSON para sobreviver a reinícios.
+import json
+import math
+import os
+import tempfile
+import threading
+
+FAIXAS_POR_DIA = 24          # faixas de 1 hora
+TIPOS_DE_DIA = 2             # 0 = dia útil, 1 = sábado/domingo
+MIN_DIAS_FAIXA = 3           # dias distintos antes de confiar na faixa
+MIN_AMOSTRAS_GLOBAL = 100    # abaixo disso o canal ainda está aprendendo
+Z_LIMITE = 4.5               # |z| acima disso gera alarme imediato
+CUSUM_K = 0.5                # folga do CUSUM (em desvios-padrão)
+# Limiar do CUSUM (em desvios-padrão). O h = 4-5 clássico supõe amostras
+# independentes; aqui amostras vizinhas (3 min) têm z-scores fortemente
+# correlacionados e o CUSUM acumula bem mais rápido: com h = 5 a semana de
+# ajuste (aprende 01-07/08, avalia 08-14/08) dá 128 alarmes falsos. 10 é o
+# menor h sem alarme falso nessa semana (com Z_LIMITE = 4.5); o resto do mês
+# fica fora do ajuste e é a referência de taxa de alarmes em test_anomalias.py.
+CUSUM_H = 10.0
+Z_REARME = 2.0               # |z| abaixo disso conta como amostra normal
+AMOSTRAS_REARME = 20         # amostras normais seguidas para rearmar o alarme
+DESVIO_MINIMO = 1e-6         # evita divisão por zero em sinais constantes
+
+
+class EstatisticaOnline:
+    __slots__ = ("n", "media", "m2", "dias", "ultimo_dia")
+
+    def __init__(self, n=0, media=0.0, m2=0.0, dias=0, ultimo_dia=0):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+        self.dias = dias
+        self.ultimo_dia = ultimo_dia
+
+    def atualizar(self, x, dia):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+        if dia != self.ultimo_dia:
+            self.dias += 1
+            self.ultimo_dia = dia
+
+    @property
+    def desvio(self):
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.n - 1))
+
+    def para_lista(self):
+        return [self.n, self.media, self.m2, self.dias, self.ultimo_dia]
+
+
+class DetectorCanal:
+    __slots__ = ("nome", "global_", "faixas", "cusum_pos", "cusum_neg", "em_alarme", "normais_seguidas")
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.global_ = EstatisticaOnline()
+        self.faixas = [EstatisticaOnline() for _ in range(FAIXAS_POR_DIA * TIPOS_DE_DIA)]
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.em_alarme = False
+        self.normais_seguidas = 0
+
+    @staticmethod
+    def _faixa(timestamp):
+        tipo = 1 if timestamp.weekday() >= 5 else 0
+        return tipo * FAIXAS_POR_DIA + (timestamp.hour * 60 + timestamp.minute) * FAIXAS_POR_DIA // 1440
+
+    def _referencia(self, faixa):
+        # Retorna (média, desvio, faixa_pronta)
+        base = self.faixas[faixa]
+        if base.dias >= MIN_DIAS_FAIXA:
+            return base.media, base.desvio, True
+        return self.global_.media, self.global_.desvio, False
+
+    def _incorporar(self, valor, faixa, dia):
+        self.global_.atualizar(valor, dia)
+        self.faixas[faixa].atualizar(valor, dia)
+
+    def aprender(self, valor, timestamp):
+        self._incorporar(valor, self._faixa(timestamp), timestamp.toordinal())
+
+    def atualizar(self, valor, timestamp):
+        # Retorna a descrição da anomalia (ou None) e incorpora a amostra à linha de base
+        faixa = self._faixa(timestamp)
+        dia = timestamp.toordinal()
+        if self.global_.n < MIN_AMOSTRAS_GLOBAL:
+            self._incorporar(valor, faixa, dia)
+            return None
+
+        media, desvio, faixa_pronta = self._referencia(faixa)
+        z = (valor - media) / max(desvio, DESVIO_MINIMO)
+        if faixa_pronta:
+            self.cusum_pos = max(0.0, self.cusum_pos + z - CUSUM_K)
+            self.cusum_neg = max(0.0, self.cusum_neg - z - CUSUM_K)
+
+        motivo = None
+        if abs(z) > Z_LIMITE:
+            motivo = f"z-score {z:+.1f} (esperado {media:.2f} ± {desvio:.2f})"
+        elif self.cusum_pos > CUSUM_H:
+            motivo = f"deriva para cima (CUSUM {self.cusum_pos:.1f})"
+        elif self.cusum_neg > CUSUM_H:
+            motivo = f"deriva para baixo (CUSUM {self.cusum_neg:.1f})"
+        if motivo is not None:
+            self.cusum_pos = 0.0
+            self.cusum_neg = 0.0
+
+        # Desvios abruptos ficam fora da linha de base para não alargá-la
+        if abs(z) <= Z_LIMITE:
+            self._incorporar(valor, faixa, dia)
+
+        # Histerese: só reporta ao entrar em alarme; rearma após amostras normais seguidas
+        if motivo is not None:
+            self.normais_seguidas = 0
+            if self.em_alarme:
+                return None
+            self.em_alarme = True
+            return motivo
+        if self.em_alarme:
+            self.normais_seguidas = self.normais_seguidas + 1 if abs(z) < Z_REARME else 0
+            if self.normais_seguidas >= AMOSTRAS_REARME:
+                self.em_alarme = False
+                self.normais_seguidas = 0
+        return None
+
+    def para_dict(self):
+        return {
+            "global": self.global_.para_lista(),
+            "faixas": [f.para_lista() for f in self.faixas],
+            "cusum": [self.cusum_pos, self.cusum_neg],
+            "alarme": [self.em_alarme, self.normais_seguidas],
+        }
+
+    @classmethod
+    def de_dict(cls, nome, dados):
+        canal = cls(nome)
+        canal.global_ = EstatisticaOnline(*dados["global"])
+        if len(dados["faixas"]) == FAIXAS_POR_DIA * TIPOS_DE_DIA:
+            canal.faixas = [EstatisticaOnline(*f) for f in dados["faixas"]]
+        canal.cusum_pos, canal.cusum_neg = dados["cusum"]
+        canal.em_alarme, canal.normais_seguidas = dados.get("alarme", [False, 0])
+        return canal
+
+
+class DetectorAnomalias:
+    def __init__(self):
+        self.canais = {}
+        self.amostras_desde_salvo = 0
+        self._lock = threading.Lock()
+
+    def canal(self, nome):
+        detector = self.canais.get(nome)
+        if detector is None:
+            detector = self.canais[nome] = DetectorCanal(nome)
+        return detector
+
+    def aprender(self, nome, valor, timestamp):
+        with self._lock:
+            self.canal(nome).aprender(float(valor), timestamp)
+
+    def atualizar(self, nome, valor, timestamp):
+        with self._lock:
+            self.amostras_desde_salvo += 1
+            return self.canal(nome).atualizar(float(valor), timestamp)
+
+    def salvar(self, caminho):
+        with self._lock:
+            estado = {nome: c.para_dict() for nome, c in self.canais.items()}
+            self.amostras_desde_salvo = 0
+        # Arquivo temporário exclusivo no mesmo diretório, para o os.replace ser atômico
+        descritor, temporario = tempfile.mkstemp(prefix=".anomalias-", suffix=".tmp",
+                                                 dir=os.path.dirname(os.path.abspath(caminho)))
+        try:
+            with os.fdopen(descritor, "w", encoding="utf-8") as f:
+                json.dump(estado, f)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    @classmethod
+    def carregar(cls, caminho):
+        detector = cls()
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        for nome, estado in dados.items():
+            detector.canais[nome] = DetectorCanal.de_dict(nome, estado)
+        return detector
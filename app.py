@@ -2,18 +2,24 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
 from streamlit_autorefresh import st_autorefresh
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 import numpy as np
 import collections
-
-# --- CONFIGURAÇÕES ---
-PATHS = {
-    "A": "Planilha_LAT - FASEA.csv",
-    "B": "Planilha_LAT - FASEB.csv",
-    "C": "Planilha_LAT - FASEC.csv"
-}
+import bisect
+from snapshot_api import SnapshotStore, iniciar_servidor
+from ingestao import IngestaoProcesso
+from anomalias import DetectorAnomalias
+from medicao import (PATHS, TARIFAS, demand_window, colunas, carregar_csv, calcular_demanda_maxima,
+                     calcular_conta_estimada, limites_dia, calcular_agregados_diarios)
+
+# --- CONFIGURAÇÕES (arquivos, tarifas e janela de demanda em medicao.py) ---
 REFRESH_INTERVAL_MS = 500
 
+# --- API JSON PARA IHMs / PAINÉIS (ver snapshot_api.py) ---
+API_ATIVA = True
+API_HOST = "127.0.0.1"
+API_PORTA = 8600
+
 # --- LIMITES DE OPERAÇÃO ---
 TENSÃO_MIN = 200.0     # Volts
 TENSÃO_MAX = 250.0     # Volts
@@ -25,80 +31,37 @@ FREQUENCIA_MAX = 62.0 # Hz (para sistema 60Hz)
 FATOR_POTENCIA_MIN = 0.85 # Mínimo recomendado
 DEMANDA_MAXIMA = 160000.0 # Exemplo de limite de demanda máxima (W)
 
-# --- TARIFAS BRASILEIRAS (EXEMPLO) ---
-TARIFAS = {
-    "TE": 0.60, # Tarifa de Energia (R$/kWh)
-    "TUSD": 0.40, # Tarifa de Uso do Sistema de Distribuição (R$/kWh)
-    "ICMS": 0.25, # Imposto sobre Circulação de Mercadorias e Serviços (%)
-    "PIS": 0.0165, # Programa de Integração Social (%)
-    "COFINS": 0.076, # Contribuição para o Financiamento da Seguridade Social (%)
-    "BANDEIRAS": {
-        "Verde": 0.00,
-        "Amarela": 0.02, # Exemplo de custo extra por kWh
-        "Vermelha 1": 0.05,
-        "Vermelha 2": 0.08,
-    }
+# --- DETECÇÃO DE ANOMALIAS (ver anomalias.py) ---
+GRANDEZAS_ANOMALIA = {
+    "tensao": "Tensão",
+    "corrente": "Corrente",
+    "potencia": "Potência Aparente",
+    "frequencia": "Frequência",
+    "fator_de_potencia": "Fator de Potência",
+    "potencia_ativa": "Potência Ativa",
+    "potencia_reativa": "Potência Reativa",
 }
+ANOMALIAS_ESTADO = "estado_anomalias.json" # Estado salvo para não reaprender após reinício
+ANOMALIAS_SALVAR_A_CADA = 300 # amostras entre gravações do estado
 
-# --- NOMES DAS COLUNAS POR FASE ---
-colunas = {
-    "A": {
-        "tensao": "Tensao_Fase_A",
-        "corrente": "Corrente_Fase_A",
-        "potencia": "Potencia_Aparente_Fase_A",
-        "frequencia": "Frequencia_Fase_A",
-        "fator_de_potencia": "fator_De_Potencia_Fase_A",
-        "consumo": "C (kWh)",
-        "potencia_ativa": "Potencia_Ativa_Fase_A",
-        "potencia_reativa": "Potencia_Reativa_Fase_A"
-    },
-    "B": {
-        "tensao": "Tensao_Fase_B",
-        "corrente": "Corrente_Fase_B",
-        "potencia": "Potencia_Aparente_Fase_B",
-        "frequencia": "Frequencia_Fase_B",
-        "fator_de_potencia": "fator_De_Potencia_Fase_B",
-        "consumo": "C (kWh)",
-        "potencia_ativa": "Potencia_Ativa_Fase_B",
-        "potencia_reativa": "Potencia_Reativa_Fase_B"
-    },
-    "C": {
-        "tensao": "Tensao_Fase_C",
-        "corrente": "Corrente_Fase_C",
-        "potencia": "Potencia_Aparente_Fase_C",
-        "frequencia": "Frequencia_Fase_C",
-        "fator_de_potencia": "fator_De_Potencia_Fase_C",
-        "consumo": "C (kWh)",
-        "potencia_ativa": "Potencia_Ativa_Fase_C",
-        "potencia_reativa": "Potencia_Reativa_Fase_C"
-    }
-}
+# --- REPLAY: VELOCIDADES (amostras processadas por atualização) ---
+VELOCIDADES_REPLAY = {"1x": 1, "5x": 5, "20x": 20, "100x": 100}
+
+# --- REPRESENTAÇÃO COMPACTA EM MEMÓRIA (ver medicao.py) ---
+MODO_COMPACTO = True
 
 # --- LEITURA E LIMPEZA ---
 @st.cache_data
-def load_and_clean_csv(path):
+def load_and_clean_csv(path, colunas_fase=None, compacto=MODO_COMPACTO):
     try:
-        df = pd.read_csv(path)
-        
-        if df.empty:
-            return pd.DataFrame()
-            
-        for col in df.columns:
-            if col in ["Data", "Horário"]:
-                continue
-            df[col] = df[col].astype(str).str.replace(",", ".", regex=False)
-            try:
-                df[col] = df[col].astype(float)
-            except ValueError:
-                pass
-        df['Timestamp'] = pd.to_datetime(df['Data'] + ' ' + df['Horário'], format='%d/%m/%Y %H:%M:%S')
-        df = df.sort_values(by='Timestamp').reset_index(drop=True)
-        return df
+        return carregar_csv(path, colunas_fase, compacto)
     except FileNotFoundError:
         st.error(f"Arquivo não encontrado: {path}")
-        return pd.DataFrame()
+        return pd.DataFrame(), {"antes": 0.0, "depois": 0.0, "linhas": 0}
 
-dfs = {fase: load_and_clean_csv(path) for fase, path in PATHS.items()}
+carregados = {fase: load_and_clean_csv(path, colunas[fase]) for fase, path in PATHS.items()}
+dfs = {fase: df for fase, (df, _) in carregados.items()}
+relatorios_memoria = {fase: relatorio for fase, (_, relatorio) in carregados.items()}
 
 # --- CONFIGURAÇÃO DE PÁGINA ---
 st.set_page_config(page_title="Supervisório LAT Trifásico", layout="wide")
@@ -153,16 +116,134 @@ if "consumo_acumulado" not in st.session_state:
     st.session_state["consumo_acumulado"] = consumo_inicial
     st.session_state["consumo_acumulado_temp"] = 0.0
 
-# --- Função para calcular o consumo diário de forma segura
-def calcular_consumo_diario(df_A, df_B, df_C):
-    if df_A.empty or df_B.empty or df_C.empty or 'C (kWh)' not in df_A.columns:
-        return 0.0
-    
-    consumo_A = df_A['C (kWh)'].iloc[-1] - df_A['C (kWh)'].iloc[0]
-    consumo_B = df_B['C (kWh)'].iloc[-1] - df_B['C (kWh)'].iloc[0]
-    consumo_C = df_C['C (kWh)'].iloc[-1] - df_C['C (kWh)'].iloc[0]
-    
-    return consumo_A + consumo_B + consumo_C
+# --- REPLAY: AGREGADOS DIÁRIOS PRÉ-CALCULADOS (ver medicao.py) ---
+@st.cache_data
+def preparar_agregados_replay(_dfs, chave):
+    return calcular_agregados_diarios(_dfs, demand_window)
+
+agregados_replay = preparar_agregados_replay(dfs, tuple(PATHS.items()))
+
+# --- INGESTÃO EM NÍVEL DE PROCESSO (única dona da API, ver ingestao.py) ---
+# As sessões têm replays próprios (busca, pausa, velocidade) e não publicam nem
+# treinam o detector; a API e o log de anomalias seguem a linha do tempo desta
+# ingestão, que roda mesmo sem navegador aberto.
+@st.cache_resource
+def iniciar_ingestao_processo(_dfs, _agregados, chave):
+    store = SnapshotStore()
+    if API_ATIVA:
+        try:
+            iniciar_servidor(store, API_HOST, API_PORTA)
+        except OSError as e:
+            st.warning(f"API de snapshot não iniciada em {API_HOST}:{API_PORTA}: {e}")
+    # Detector de anomalias: restaura o estado salvo ou aprende com o histórico anterior ao replay
+    detector = DetectorAnomalias.carregar(ANOMALIAS_ESTADO)
+    ingestao = IngestaoProcesso(_dfs, _agregados, store, demand_window, TARIFAS, REFRESH_INTERVAL_MS / 1000,
+                                detector=detector or DetectorAnomalias(), grandezas_anomalia=GRANDEZAS_ANOMALIA,
+                                caminho_estado=ANOMALIAS_ESTADO, salvar_a_cada=ANOMALIAS_SALVAR_A_CADA)
+    if detector is None:
+        ingestao.aprender_historico()
+    ingestao.iniciar()
+    return ingestao
+
+ingestao_processo = iniciar_ingestao_processo(dfs, agregados_replay, tuple(PATHS.items()))
+
+# --- ALARMES DE LIMITE CALCULADOS EM BLOCO SOBRE TRECHOS DE AMOSTRAS ---
+# Mesmas regras e mensagens de visor_fases/visor_total, aplicadas a todas as linhas
+# de cada trecho. Retorna (timestamp, mensagem) em ordem cronológica, no máximo
+# as últimas `limite` ocorrências de cada verificação.
+def alarmes_de_limite(trechos, limite):
+    eventos = []
+    for fase, trecho in trechos.items():
+        verificacoes = [
+            ("Tensão", "tensao", "V", lambda v: (v < TENSÃO_MIN) | (v > TENSÃO_MAX)),
+            ("Corrente", "corrente", "A", lambda v: v > CORRENTE_MAX),
+            ("Potência", "potencia", "VA", lambda v: v > POTENCIA_APARENTE_MAX),
+            ("Frequência", "frequencia", "Hz", lambda v: (v < FREQUENCIA_MIN) | (v > FREQUENCIA_MAX)),
+            ("Fator de Potência", "fator_de_potencia", "", lambda v: v < FATOR_POTENCIA_MIN),
+        ]
+        for nome, grandeza, unidade, fora_do_limite in verificacoes:
+            col = colunas[fase][grandeza]
+            if col not in trecho.columns:
+                continue
+            alarmes = trecho[fora_do_limite(trecho[col])].tail(limite)
+            for ts, valor in zip(alarmes["Timestamp"], alarmes[col]):
+                eventos.append((ts, f"[{ts.strftime('%H:%M:%S')}] ALARME de {nome} na Fase {fase}: {valor:.2f} {unidade}".rstrip()))
+
+    # Totais: amostras das três fases alinhadas por posição, como no cálculo da demanda
+    if len(trechos) == 3:
+        n = min(len(t) for t in trechos.values())
+        if n > 0:
+            p_total = sum(trechos[fase][colunas[fase]["potencia_ativa"]].to_numpy(dtype=float)[:n] for fase in ["A", "B", "C"])
+            q_total = sum(trechos[fase][colunas[fase]["potencia_reativa"]].to_numpy(dtype=float)[:n] for fase in ["A", "B", "C"])
+            s_total = np.sqrt(p_total ** 2 + q_total ** 2)
+            fp_total = np.divide(p_total, s_total, out=np.zeros_like(s_total), where=s_total != 0)
+            timestamps = trechos["A"]["Timestamp"].iloc[:n]
+            totais = [
+                ("Potência Aparente Total", s_total, "VA", s_total > POTENCIA_APARENTE_TOTAL_MAX),
+                ("Fator de Potência Total", fp_total, "", fp_total < FATOR_POTENCIA_MIN),
+            ]
+            for nome, valores, unidade, fora_do_limite in totais:
+                posicoes = np.flatnonzero(fora_do_limite)[-limite:]
+                for i in posicoes:
+                    ts = timestamps.iloc[i]
+                    eventos.append((ts, f"[{ts.strftime('%H:%M:%S')}] ALARME Total de {nome}: {valores[i]:.2f} {unidade}".rstrip()))
+
+    eventos.sort(key=lambda e: e[0])
+    return eventos
+
+# --- REPLAY: ALARMES DE LIMITE RECONSTRUÍDOS A PARTIR DAS AMOSTRAS DO DIA ---
+def reconstruir_log_alarmes(trechos):
+    eventos = alarmes_de_limite(trechos, st.session_state["log_erros"].maxlen)
+    st.session_state["log_erros"].clear()
+    st.session_state["log_erros"].extend(msg for _, msg in eventos)
+
+# --- SÉRIES DE UM TRECHO NO FORMATO DE valores_{fase} (busca e visão "Ao vivo") ---
+def valores_do_trecho(fase, trecho):
+    # Mesma regra da ingestão: corrente zerada repete a última leitura não nula
+    corrente = trecho[colunas[fase]["corrente"]].astype(float).replace(0.0, np.nan).ffill().fillna(0.0)
+    return {
+        "tensao": trecho[colunas[fase]["tensao"]].astype(float).tolist(),
+        "corrente": corrente.tolist(),
+        "potencia": trecho[colunas[fase]["potencia"]].astype(float).tolist(),
+        "timestamp": trecho["Timestamp"].tolist(),
+        "potencia_ativa": trecho[colunas[fase]["potencia_ativa"]].astype(float).tolist(),
+        "potencia_reativa": trecho[colunas[fase]["potencia_reativa"]].astype(float).tolist(),
+        "consumo": trecho[colunas[fase]["consumo"]].astype(float).tolist(),
+    }
+
+# --- REPLAY: BUSCA DE UM INSTANTE QUALQUER (O(log n), sem reprocessar desde o início) ---
+def buscar_instante(instante):
+    dias = agregados_replay["dias"]
+    if len(dias) < 2:
+        return
+    # O primeiro dia só existe como "dia anterior"; o replay começa no segundo
+    inicio_replay = pd.Timestamp(dias[1])
+    fim_replay = pd.Timestamp(dias[-1]) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    instante = min(max(pd.Timestamp(instante), inicio_replay), fim_replay)
+
+    k = bisect.bisect_right(dias, instante.date()) - 1
+    dia = dias[k]
+    st.session_state["dia_atual"] = dia
+    st.session_state["dia_anterior"] = dia - timedelta(days=1)
+    st.session_state["consumo_acumulado"] = agregados_replay["consumo_acumulado"][k]
+    st.session_state["max_demanda_historica"], st.session_state["dia_max_demanda_historica"] = agregados_replay["demanda_historica"][k]
+
+    trechos = {}
+    for fase in ["A", "B", "C"]:
+        df = dfs[fase]
+        inicio, fim_dia = limites_dia(df, dia)
+        fim = int(np.searchsorted(df["Timestamp"].values, np.datetime64(instante.to_datetime64()), side="right"))
+        fim = max(inicio, min(fim, fim_dia))
+        trecho = df.iloc[inicio:fim]
+        trechos[fase] = trecho
+
+        valores = valores_do_trecho(fase, trecho)
+        st.session_state[f"index_{fase}"] = fim - inicio
+        st.session_state[f"corrente_anterior_{fase}"] = valores["corrente"][-1] if valores["corrente"] else 0.0
+        st.session_state[f"valores_{fase}"] = valores
+    reconstruir_log_alarmes(trechos)
+    # A execução que segue a busca não ingere nada: a tela para no instante pedido
+    st.session_state["replay_buscou"] = True
 
 # --- Layout com logo e título lado a lado ---
 col_logo, col_titulo = st.columns([1, 5])
@@ -172,11 +253,13 @@ with col_titulo:
     st.markdown("<h1 style='padding-top: 90px;'>Supervisório de Medição Elétrica</h1>", unsafe_allow_html=True)
 
 # --- FUNÇÃO PARA ATUALIZAR DADOS DO DIA ATUAL (sempre ativa) ---
+# Retorna a posição (em df) da linha ingerida, ou None se nada foi ingerido.
 def atualizar_dados_dia_atual(fase, df):
     if df.empty:
         return
     
-    df_dia_atual = df[df["Timestamp"].dt.date == st.session_state["dia_atual"]]
+    inicio, fim = limites_dia(df, st.session_state["dia_atual"])
+    df_dia_atual = df.iloc[inicio:fim]
     
     if df_dia_atual.empty:
         return
@@ -185,32 +268,27 @@ def atualizar_dados_dia_atual(fase, df):
         # AQUI É ONDE O DIA MUDA - FIM DA SIMULAÇÃO DO DIA ANTERIOR
         if fase == "C":
             # Calcula e adiciona o consumo do dia anterior ao acumulado
-            df_dia_anterior_A = dfs["A"][dfs["A"]["Timestamp"].dt.date == st.session_state["dia_anterior"]]
-            df_dia_anterior_B = dfs["B"][dfs["B"]["Timestamp"].dt.date == st.session_state["dia_anterior"]]
-            df_dia_anterior_C = dfs["C"][dfs["C"]["Timestamp"].dt.date == st.session_state["dia_anterior"]]
-
-            consumo_do_dia_anterior = calcular_consumo_diario(df_dia_anterior_A, df_dia_anterior_B, df_dia_anterior_C)
+            consumo_do_dia_anterior = agregados_replay["consumo_diario"].get(st.session_state["dia_anterior"], 0.0)
             st.session_state["consumo_acumulado"] += consumo_do_dia_anterior
+
+            # Garante a demanda do dia que termina mesmo quando a velocidade pula o último quadro
+            demanda_do_dia = agregados_replay["demanda_diaria"].get(st.session_state["dia_atual"], 0.0)
+            if demanda_do_dia > st.session_state["max_demanda_historica"]:
+                st.session_state["max_demanda_historica"] = demanda_do_dia
+                st.session_state["dia_max_demanda_historica"] = st.session_state["dia_atual"].strftime('%d/%m/%Y')
             
             st.session_state["dia_anterior"] = st.session_state["dia_atual"]
             st.session_state["dia_atual"] += timedelta(days=1)
-            df_dia_atual_prox = df[df["Timestamp"].dt.date == st.session_state["dia_atual"]]
-            if df_dia_atual_prox.empty:
+            inicio_prox, fim_prox = limites_dia(df, st.session_state["dia_atual"])
+            if fim_prox == inicio_prox:
                 st.session_state["dia_anterior"] = dfs["A"]["Timestamp"].min().date()
                 st.session_state["dia_atual"] = st.session_state["dia_anterior"] + timedelta(days=1)
                 
                 # Reinicializar o consumo acumulado para o novo ciclo
-                dia_inicial_consumo = dfs["A"]["Timestamp"].min().date()
-                df_dia_inicial_A = dfs["A"][dfs["A"]["Timestamp"].dt.date == dia_inicial_consumo]
-                df_dia_inicial_B = dfs["B"][dfs["B"]["Timestamp"].dt.date == dia_inicial_consumo]
-                df_dia_inicial_C = dfs["C"][dfs["C"]["Timestamp"].dt.date == dia_inicial_consumo]
-                
-                if not df_dia_inicial_A.empty and not df_dia_inicial_B.empty and not df_dia_inicial_C.empty:
-                    consumo_inicial = df_dia_inicial_A['C (kWh)'].iloc[-1] + df_dia_inicial_B['C (kWh)'].iloc[-1] + df_dia_inicial_C['C (kWh)'].iloc[-1]
-                st.session_state["consumo_acumulado"] = consumo_inicial
+                st.session_state["consumo_acumulado"] = agregados_replay["consumo_inicial"]
                 
-                df_dia_atual_prox = df[df["Timestamp"].dt.date == st.session_state["dia_atual"]]
-                if df_dia_atual_prox.empty:
+                inicio_prox, fim_prox = limites_dia(df, st.session_state["dia_atual"])
+                if fim_prox == inicio_prox:
                     return
 
         st.session_state[f"index_{fase}"] = 0
@@ -223,6 +301,7 @@ def atualizar_dados_dia_atual(fase, df):
         st.session_state[f"valores_{fase}"]["consumo"] = []
         
     idx = st.session_state[f"index_{fase}"]
+    posicao = inicio + idx
     row = df_dia_atual.iloc[idx]
     st.session_state[f"index_{fase}"] += 1
 
@@ -253,15 +332,91 @@ def atualizar_dados_dia_atual(fase, df):
         st.session_state[f"valores_{fase}"]["consumo"].append(float(consumo))
     if timestamp is not None:
         st.session_state[f"valores_{fase}"]["timestamp"].append(timestamp)
+    return posicao
+
+# --- CONTROLES DE REPLAY ---
+if "replay_pausado" not in st.session_state:
+    st.session_state["replay_pausado"] = False
+if "replay_passo" not in st.session_state:
+    st.session_state["replay_passo"] = False
+if "replay_buscou" not in st.session_state:
+    st.session_state["replay_buscou"] = False
+if "replay_velocidade" not in st.session_state:
+    st.session_state["replay_velocidade"] = "1x"
+if "replay_data" not in st.session_state:
+    st.session_state["replay_data"] = st.session_state["dia_atual"]
+if "replay_hora" not in st.session_state:
+    st.session_state["replay_hora"] = time(0, 0)
+
+with st.expander("Controles de replay"):
+    col_play, col_passo, col_velocidade = st.columns(3)
+    with col_play:
+        st.button("Continuar" if st.session_state["replay_pausado"] else "Pausar",
+                  on_click=lambda: st.session_state.update(replay_pausado=not st.session_state["replay_pausado"]),
+                  use_container_width=True)
+    with col_passo:
+        st.button("Avançar um passo", on_click=lambda: st.session_state.update(replay_passo=True), use_container_width=True)
+    with col_velocidade:
+        st.select_slider("Velocidade", options=list(VELOCIDADES_REPLAY), key="replay_velocidade")
+
+    if len(agregados_replay["dias"]) >= 2:
+        col_data, col_hora, col_ir = st.columns(3)
+        with col_data:
+            st.date_input("Data", min_value=agregados_replay["dias"][1], max_value=agregados_replay["dias"][-1], key="replay_data")
+        with col_hora:
+            st.time_input("Horário", step=180, key="replay_hora")
+        with col_ir:
+            st.button("Ir para o instante",
+                      on_click=lambda: buscar_instante(datetime.combine(st.session_state["replay_data"], st.session_state["replay_hora"])),
+                      use_container_width=True)
 
 # --- ATUALIZANDO DADOS DO DIA ATUAL EM TODAS AS FASES ---
-for fase in ["A", "B", "C"]:
-    atualizar_dados_dia_atual(fase, dfs[fase])
+passos = VELOCIDADES_REPLAY[st.session_state["replay_velocidade"]]
+if st.session_state["replay_pausado"]:
+    passos = 1 if st.session_state["replay_passo"] else 0
+if st.session_state["replay_buscou"]:
+    passos = 0
+st.session_state["replay_passo"] = False
+st.session_state["replay_buscou"] = False
+
+posicoes_ingeridas = {fase: [] for fase in ["A", "B", "C"]}
+for _ in range(passos):
+    for fase in ["A", "B", "C"]:
+        posicao = atualizar_dados_dia_atual(fase, dfs[fase])
+        if posicao is not None:
+            posicoes_ingeridas[fase].append(posicao)
+
+# Em velocidades acima de 1x os visores só veem a última linha do lote; as
+# demais passam pelas mesmas verificações de limite aqui, para não sumirem do log.
+if passos > 1:
+    trechos_lote = {fase: dfs[fase].iloc[posicoes[:-1]] for fase, posicoes in posicoes_ingeridas.items() if len(posicoes) > 1}
+    for _, mensagem in alarmes_de_limite(trechos_lote, st.session_state["log_erros"].maxlen):
+        st.session_state["log_erros"].append(mensagem)
     
 st.markdown("---")
 
 # --- SELETOR DE DIA ---
-dia_escolhido = st.radio("Selecionar dia para visualização:", ("Dia Atual", "Dia Anterior"))
+dia_escolhido = st.radio("Selecionar dia para visualização:", ("Dia Atual", "Dia Anterior", "Ao vivo"))
+
+# --- VISÃO "AO VIVO": LINHA DO TEMPO DA INGESTÃO DO PROCESSO (a mesma da API) ---
+# "Dia Atual" e "Dia Anterior" seguem o replay desta sessão (busca, pausa,
+# velocidade); a API e o log de anomalias seguem a ingestão do processo.
+estado_ao_vivo = ingestao_processo.estado() if dia_escolhido == "Ao vivo" else None
+if dia_escolhido == "Ao vivo":
+    st.caption("Ao vivo: mesmos valores servidos pela API de snapshot, independentes do replay desta sessão.")
+    if estado_ao_vivo is None:
+        st.info("Ingestão do processo ainda sem amostras.")
+
+# Séries do dia exibido nos visores e gráficos: replay da sessão ou ingestão do processo
+if estado_ao_vivo is not None:
+    dia_exibido = estado_ao_vivo["dia"]
+    series_exibidas = {}
+    for fase in ["A", "B", "C"]:
+        inicio, _ = limites_dia(dfs[fase], dia_exibido)
+        series_exibidas[fase] = valores_do_trecho(fase, dfs[fase].iloc[inicio:inicio + estado_ao_vivo["amostras"]])
+else:
+    dia_exibido = st.session_state["dia_atual"]
+    series_exibidas = {fase: st.session_state[f"valores_{fase}"] for fase in ["A", "B", "C"]}
 
 # --- PEGANDO VALORES PARA EXIBIÇÃO ---
 valores_tensao = {}
@@ -280,7 +435,21 @@ for fase in ["A", "B", "C"]:
         tensao, corrente, potencia, frequencia, fator_potencia, consumo = 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
         potencia_ativa, potencia_reativa = 0.0, 0.0
     else:
-        if dia_escolhido == "Dia Atual":
+        if dia_escolhido == "Ao vivo":
+            if estado_ao_vivo is not None:
+                dados_api = estado_ao_vivo["dados"]
+                tensao = dados_api["tensao"][fase]
+                corrente = dados_api["corrente"][fase]
+                potencia = dados_api["potencia_aparente"][fase]
+                frequencia = dados_api["frequencia"][fase]
+                fator_potencia = dados_api["fator_de_potencia"][fase]
+                consumo = dados_api["consumo"][fase]
+                potencia_ativa = series_exibidas[fase]["potencia_ativa"][-1]
+                potencia_reativa = series_exibidas[fase]["potencia_reativa"][-1]
+            else:
+                tensao, corrente, potencia, frequencia, fator_potencia, consumo = 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+                potencia_ativa, potencia_reativa = 0.0, 0.0
+        elif dia_escolhido == "Dia Atual":
             df_dia_escolhido = df[df["Timestamp"].dt.date == st.session_state["dia_atual"]]
             dados_sessao = st.session_state[f"valores_{fase}"]
 
@@ -327,7 +496,7 @@ for fase in ["A", "B", "C"]:
     valores_potencia_ativa[fase] = float(potencia_ativa)
     valores_potencia_reativa[fase] = float(potencia_reativa)
 
-timestamp_ultimo_dado = st.session_state["valores_A"]["timestamp"][-1] if st.session_state["valores_A"]["timestamp"] else datetime.now()
+timestamp_ultimo_dado = series_exibidas["A"]["timestamp"][-1] if series_exibidas["A"]["timestamp"] else datetime.now()
 
 
 # --- VISOR PERSONALIZADO ---
@@ -495,26 +664,35 @@ Q_total_inst = sum(valores_potencia_reativa.values())
 S_total_inst = np.sqrt(P_total_inst**2 + Q_total_inst**2)
 FP_total_inst = P_total_inst / S_total_inst if S_total_inst != 0 else 0
 
-demand_window = 5 # 5 pontos de 3min = 15 minutos
-
 # --- CÁLCULO DA DEMANDA MÁXIMA DO DIA ATUAL EM TEMPO REAL ---
-if dia_escolhido == "Dia Atual":
+max_demanda_exibida = st.session_state["max_demanda_historica"]
+dia_max_demanda_exibida = st.session_state["dia_max_demanda_historica"]
+if dia_escolhido == "Ao vivo":
+    # Totais exatamente como publicados na API; a maior demanda segue a linha do tempo do processo
+    demanda_maxima, consumo_total_para_calculo = 0.0, 0.0
+    max_demanda_exibida, dia_max_demanda_exibida = 0.0, ""
+    if estado_ao_vivo is not None:
+        dados_api = estado_ao_vivo["dados"]
+        S_total_inst = dados_api["potencia_aparente_total"]
+        FP_total_inst = dados_api["fator_de_potencia_total"]
+        demanda_maxima = dados_api["demanda_maxima"]
+        consumo_total_para_calculo = dados_api["consumo_total"]
+        max_demanda_exibida, dia_max_demanda_exibida = agregados_replay["demanda_historica"][estado_ao_vivo["indice_dia"]]
+        if demanda_maxima > max_demanda_exibida:
+            max_demanda_exibida, dia_max_demanda_exibida = demanda_maxima, dia_exibido.strftime('%d/%m/%Y')
+elif dia_escolhido == "Dia Atual":
     potencia_ativa_faseA = st.session_state["valores_A"]["potencia_ativa"]
     potencia_ativa_faseB = st.session_state["valores_B"]["potencia_ativa"]
     potencia_ativa_faseC = st.session_state["valores_C"]["potencia_ativa"]
 
-    min_len_p_ativa = min(len(potencia_ativa_faseA), len(potencia_ativa_faseB), len(potencia_ativa_faseC))
-    
-    demanda_maxima_dia_atual = 0.0
-    if min_len_p_ativa >= demand_window:
-        total_potencia_ativa_historico = [sum(p) for p in zip(potencia_ativa_faseA[:min_len_p_ativa], potencia_ativa_faseB[:min_len_p_ativa], potencia_ativa_faseC[:min_len_p_ativa])]
-        total_series = pd.Series(total_potencia_ativa_historico)
-        demanda_maxima_dia_atual = total_series.rolling(window=demand_window).mean().max()
+    demanda_maxima_dia_atual = calcular_demanda_maxima(potencia_ativa_faseA, potencia_ativa_faseB, potencia_ativa_faseC, demand_window)
     
     # Compara a demanda do dia atual com a histórica
     if demanda_maxima_dia_atual > st.session_state["max_demanda_historica"]:
         st.session_state["max_demanda_historica"] = demanda_maxima_dia_atual
         st.session_state["dia_max_demanda_historica"] = st.session_state["dia_atual"].strftime('%d/%m/%Y')
+    max_demanda_exibida = st.session_state["max_demanda_historica"]
+    dia_max_demanda_exibida = st.session_state["dia_max_demanda_historica"]
     
     demanda_maxima = demanda_maxima_dia_atual
     
@@ -528,30 +706,17 @@ else: # Dia Anterior
     df_B = dfs["B"][dfs["B"]["Timestamp"].dt.date == st.session_state["dia_anterior"]]
     df_C = dfs["C"][dfs["C"]["Timestamp"].dt.date == st.session_state["dia_anterior"]]
 
-    if not df_A.empty and not df_B.empty and not df_C.empty:
-        min_len_df = min(len(df_A), len(df_B), len(df_C))
-        
-        df_A = df_A.iloc[:min_len_df]
-        df_B = df_B.iloc[:min_len_df]
-        df_C = df_C.iloc[:min_len_df]
-        
-        if len(df_A) >= demand_window:
-            total_potencia_ativa_historico = df_A[colunas["A"]["potencia_ativa"]].add(df_B[colunas["B"]["potencia_ativa"]], fill_value=0).add(df_C[colunas["C"]["potencia_ativa"]], fill_value=0)
-            demanda_maxima = total_potencia_ativa_historico.rolling(window=demand_window).mean().max()
-        else:
-            demanda_maxima = 0.0
-    else:
-        demanda_maxima = 0.0
+    demanda_maxima = calcular_demanda_maxima(df_A[colunas["A"]["potencia_ativa"]], df_B[colunas["B"]["potencia_ativa"]],
+                                             df_C[colunas["C"]["potencia_ativa"]], demand_window)
     
     # Consumo total do dia anterior (já está no acumulado, então não precisa adicionar de novo)
     consumo_total_para_calculo = st.session_state["consumo_acumulado"]
 
 # --- CÁLCULO DA CONTA ESTIMADA (AGORA ACUMULADA) ---
-custo_bandeira_verde = TARIFAS["BANDEIRAS"]["Verde"]
-custo_base_realtime = consumo_total_para_calculo * (TARIFAS["TE"] + TARIFAS["TUSD"] + custo_bandeira_verde)
-impostos_realtime = custo_base_realtime * (TARIFAS["ICMS"] + TARIFAS["PIS"] + TARIFAS["COFINS"])
-conta_estimada_acumulada = custo_base_realtime + impostos_realtime
-
+if estado_ao_vivo is not None:
+    conta_estimada_acumulada = estado_ao_vivo["dados"]["conta_estimada"]
+else:
+    conta_estimada_acumulada = calcular_conta_estimada(consumo_total_para_calculo, TARIFAS, "Verde")
 
 st.markdown("<h3>Grandezas Totais e Demanda</h3>", unsafe_allow_html=True)
 col7, col8, col9 = st.columns(3)
@@ -601,9 +766,9 @@ with col_conta:
             width: 100%;
             margin-top: 10px;
         '>
-            Maior demanda registrada: {st.session_state["max_demanda_historica"]:.2f} W
+            Maior demanda registrada: {max_demanda_exibida:.2f} W
             <br>
-            Dia da Ocorrência: {st.session_state["dia_max_demanda_historica"]}
+            Dia da Ocorrência: {dia_max_demanda_exibida}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -637,8 +802,8 @@ plotted = False
 
 if grafico_selecionado in ["Tensão", "Corrente", "Potência Aparente"]:
     for fase in ["A", "B", "C"]:
-        if dia_escolhido == "Dia Atual":
-            dados = st.session_state[f"valores_{fase}"]
+        if dia_escolhido != "Dia Anterior":
+            dados = series_exibidas[fase]
             x_values = dados.get("timestamp", [])
             y_key = grafico_key_map.get(grafico_selecionado)
             if y_key and dados.get(y_key):
@@ -671,10 +836,10 @@ if grafico_selecionado in ["Tensão", "Corrente", "Potência Aparente"]:
             ))
 
 elif grafico_selecionado in ["Potência Aparente Total", "Fator de Potência Total"]:
-    if dia_escolhido == "Dia Atual":
-        dados_A = st.session_state["valores_A"]
-        dados_B = st.session_state["valores_B"]
-        dados_C = st.session_state["valores_C"]
+    if dia_escolhido != "Dia Anterior":
+        dados_A = series_exibidas["A"]
+        dados_B = series_exibidas["B"]
+        dados_C = series_exibidas["C"]
         
         min_len = min(len(dados_A["potencia_ativa"]), len(dados_B["potencia_ativa"]), len(dados_C["potencia_ativa"]))
         
@@ -704,8 +869,8 @@ elif grafico_selecionado in ["Potência Aparente Total", "Fator de Potência Tot
             df_C = df_C.iloc[:min_len_df]
             
             x_values = df_A["Timestamp"]
-            p_ativa_total = df_A[colunas["A"]["potencia_ativa"]].add(df_B[colunas["B"]["potencia_ativa"]], fill_value=0).add(df_C[colunas["C"]["potencia_ativa"]], fill_value=0)
-            p_reativa_total = df_A[colunas["A"]["potencia_reativa"]].add(df_B[colunas["B"]["potencia_reativa"]], fill_value=0).add(df_C[colunas["C"]["potencia_reativa"]], fill_value=0)
+            p_ativa_total = df_A[colunas["A"]["potencia_ativa"]].astype(float).add(df_B[colunas["B"]["potencia_ativa"]].astype(float), fill_value=0).add(df_C[colunas["C"]["potencia_ativa"]].astype(float), fill_value=0)
+            p_reativa_total = df_A[colunas["A"]["potencia_reativa"]].astype(float).add(df_B[colunas["B"]["potencia_reativa"]].astype(float), fill_value=0).add(df_C[colunas["C"]["potencia_reativa"]].astype(float), fill_value=0)
             
             if grafico_selecionado == "Potência Aparente Total":
                 y_data = np.sqrt(p_ativa_total**2 + p_reativa_total**2)
@@ -717,9 +882,9 @@ elif grafico_selecionado in ["Potência Aparente Total", "Fator de Potência Tot
             plotted = True
 
 if plotted:
-    if dia_escolhido == "Dia Atual":
-        date_start = datetime.combine(st.session_state["dia_atual"], datetime.min.time())
-        dia_referencia = st.session_state["dia_atual"]
+    if dia_escolhido != "Dia Anterior":
+        date_start = datetime.combine(dia_exibido, datetime.min.time())
+        dia_referencia = dia_exibido
     else:
         date_start = datetime.combine(st.session_state["dia_anterior"], datetime.min.time())
         dia_referencia = st.session_state["dia_anterior"]
@@ -763,8 +928,26 @@ with st.expander("Log de alarmes"):
     else:
         st.info("Nenhum alarme registrado.")
 
+# --- LOG DE ANOMALIAS (detector da ingestão em nível de processo) ---
+with st.expander("Log de anomalias"):
+    anomalias_registradas = ingestao_processo.anomalias()
+    if anomalias_registradas:
+        for anomalia in reversed(anomalias_registradas):
+            st.warning(anomalia)
+    else:
+        st.info("Nenhuma anomalia registrada.")
 
-
-
-
-
+# --- RELATÓRIO DE USO DE MEMÓRIA ---
+with st.expander("Uso de memória dos dados"):
+    for fase in ["A", "B", "C"]:
+        relatorio = relatorios_memoria[fase]
+        if relatorio["linhas"] == 0:
+            st.info(f"Fase {fase}: sem dados carregados.")
+            continue
+        reducao = 100 * (1 - relatorio["depois"] / relatorio["antes"]) if relatorio["antes"] else 0.0
+        st.write(
+            f"Fase {fase}: {relatorio['linhas']} linhas | "
+            f"antes: {relatorio['antes']:.1f} B/linha | "
+            f"depois: {relatorio['depois']:.1f} B/linha | "
+            f"redução: {reducao:.1f}%"
+        )
@@ -0,0 +1,369 @@
+# --- ARQUIVO COLUNAR COMPRIMIDO PARA O HISTÓRICO DE MEDIÇÕES ---
+# Formato ".latc" (somente biblioteca padrão):
+#
+#   MAGIC | tamanho do cabeçalho (uint32) | cabeçalho JSON | blocos comprimidos
+#
+# Os dados são divididos em um bloco (chunk) por dia, e cada coluna de cada
+# bloco é comprimida separadamente, então ler um dia ou uma coluna só
+# descomprime o necessário.
+#   - Timestamp: segundos desde a época, delta-of-delta + zigzag varint + zlib
+#   - Grandezas: quantizadas pela precisão do medidor (casas decimais do CSV),
+#     delta + zigzag varint + zlib; sem perda em relação ao texto original
+#   - Cabeçalho guarda t_min/t_max e min/max de cada coluna por bloco, para
+#     pular blocos que não atendem ao filtro sem descomprimi-los
+#
+# Uso:
+#   python arquivo_colunar.py converter "Planilha_LAT - FASEA.csv" [saida.latc]
+#   python arquivo_colunar.py benchmark "Planilha_LAT - FASEA.csv" ...   (requer pandas)
+import calendar
+import csv
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+MAGIC = b"LATC1\n"
+VERSAO = 1
+NIVEL_ZLIB = 9
+EPOCA = datetime(1970, 1, 1)
+
+
+# --- CODIFICAÇÃO DE INTEIROS ---
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+
+def _codificar_varints(valores):
+    saida = bytearray()
+    for v in valores:
+        v = _zigzag(v)
+        while v >= 0x80:
+            saida.append((v & 0x7F) | 0x80)
+            v >>= 7
+        saida.append(v)
+    return bytes(saida)
+
+
+def _decodificar_varints(dados, quantidade):
+    valores = [0] * quantidade
+    pos = 0
+    for i in range(quantidade):
+        b = dados[pos]
+        pos += 1
+        v = b & 0x7F
+        desloc = 7
+        while b & 0x80:
+            b = dados[pos]
+            pos += 1
+            v |= (b & 0x7F) << desloc
+            desloc += 7
+        valores[i] = (v >> 1) ^ -(v & 1)
+    return valores
+
+
+def _delta(valores):
+    anterior = 0
+    saida = []
+    for v in valores:
+        saida.append(v - anterior)
+        anterior = v
+    return saida
+
+
+def _acumular(valores):
+    total = 0
+    saida = []
+    for v in valores:
+        total += v
+        saida.append(total)
+    return saida
+
+
+# --- COLUNAS ---
+def _codificar_timestamps(epocas):
+    # delta-of-delta: amostras a intervalo fixo viram uma sequência de zeros
+    return zlib.compress(_codificar_varints(_delta(_delta(epocas))), NIVEL_ZLIB)
+
+
+def _decodificar_timestamps(blob, quantidade):
+    return _acumular(_acumular(_decodificar_varints(zlib.decompress(blob), quantidade)))
+
+
+def _codificar_grandeza(valores, escala):
+    # Valores ausentes (None) repetem o último quantizado e são listados à parte
+    ausentes = []
+    quantizados = []
+    anterior = 0
+    for i, v in enumerate(valores):
+        if v is None:
+            ausentes.append(i)
+            quantizados.append(anterior)
+        else:
+            anterior = round(v * escala)
+            quantizados.append(anterior)
+    cabecalho = [len(ausentes)] + _delta(ausentes)
+    return zlib.compress(_codificar_varints(cabecalho + _delta(quantizados)), NIVEL_ZLIB)
+
+
+def _decodificar_grandeza(blob, quantidade, escala):
+    dados = zlib.decompress(blob)
+    n_ausentes = _decodificar_varints(dados, 1)[0]
+    inteiros = _decodificar_varints(dados, 1 + n_ausentes + quantidade)
+    ausentes = _acumular(inteiros[1:1 + n_ausentes])
+    valores = [q / escala for q in _acumular(inteiros[1 + n_ausentes:])]
+    for i in ausentes:
+        valores[i] = None
+    return valores
+
+
+# --- LEITURA DO CSV (Planilha_LAT) ---
+def _ler_planilha(caminho_csv):
+    with open(caminho_csv, encoding="utf-8", newline="") as f:
+        leitor = csv.reader(f)
+        cabecalho = next(leitor)
+        i_data, i_hora = cabecalho.index("Data"), cabecalho.index("Horário")
+        nomes = [c for i, c in enumerate(cabecalho) if i not in (i_data, i_hora)]
+        indices = [i for i in range(len(cabecalho)) if i not in (i_data, i_hora)]
+        epocas = []
+        colunas = {nome: [] for nome in nomes}
+        decimais = {nome: 0 for nome in nomes}
+        for linha in leitor:
+            if not linha:
+                continue
+            instante = datetime.strptime(f"{linha[i_data]} {linha[i_hora]}", "%d/%m/%Y %H:%M:%S")
+            epocas.append(calendar.timegm(instante.timetuple()))
+            for nome, i in zip(nomes, indices):
+                texto = linha[i].strip()
+                if not texto:
+                    colunas[nome].append(None)
+                    continue
+                if "," in texto:
+                    decimais[nome] = max(decimais[nome], len(texto) - texto.index(",") - 1)
+                colunas[nome].append(float(texto.replace(",", ".")))
+
+    ordem = sorted(range(len(epocas)), key=epocas.__getitem__)
+    epocas = [epocas[i] for i in ordem]
+    colunas = {nome: [valores[i] for i in ordem] for nome, valores in colunas.items()}
+    return epocas, colunas, decimais
+
+
+# --- ESCRITA ---
+def converter_csv(caminho_csv, caminho_saida=None):
+    if caminho_saida is None:
+        caminho_saida = os.path.splitext(caminho_csv)[0] + ".latc"
+    epocas, colunas, decimais = _ler_planilha(caminho_csv)
+
+    cabecalho = {
+        "versao": VERSAO,
+        "linhas": len(epocas),
+        "colunas": [{"nome": nome, "escala": 10 ** decimais[nome]} for nome in colunas],
+        "chunks": [],
+    }
+    blobs = []
+    offset = 0
+    inicio = 0
+    while inicio < len(epocas):
+        dia = epocas[inicio] // 86400
+        fim = inicio
+        while fim < len(epocas) and epocas[fim] // 86400 == dia:
+            fim += 1
+
+        chunk = {
+            "dia": (EPOCA + timedelta(days=dia)).date().isoformat(),
+            "linhas": fim - inicio,
+            "t_min": epocas[inicio],
+            "t_max": epocas[fim - 1],
+            "colunas": {},
+        }
+        blob = _codificar_timestamps(epocas[inicio:fim])
+        chunk["colunas"]["Timestamp"] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+        for coluna in cabecalho["colunas"]:
+            valores = colunas[coluna["nome"]][inicio:fim]
+            presentes = [v for v in valores if v is not None]
+            blob = _codificar_grandeza(valores, coluna["escala"])
+            chunk["colunas"][coluna["nome"]] = [
+                offset, len(blob),
+                min(presentes) if presentes else None,
+                max(presentes) if presentes else None,
+            ]
+            blobs.append(blob)
+            offset += len(blob)
+        cabecalho["chunks"].append(chunk)
+        inicio = fim
+
+    cabecalho_bytes = json.dumps(cabecalho, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with open(caminho_saida, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(cabecalho_bytes)))
+        f.write(cabecalho_bytes)
+        for blob in blobs:
+            f.write(blob)
+    return caminho_saida
+
+
+# --- LEITURA ---
+class ArquivoColunar:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Arquivo não está no formato LATC: {caminho}")
+            tamanho = struct.unpack("<I", f.read(4))[0]
+            self.cabecalho = json.loads(f.read(tamanho).decode("utf-8"))
+        if self.cabecalho.get("versao") != VERSAO:
+            raise ValueError(f"Versão de arquivo LATC não suportada: {self.cabecalho.get('versao')}")
+        self._inicio_dados = len(MAGIC) + 4 + tamanho
+        self.escalas = {c["nome"]: c["escala"] for c in self.cabecalho["colunas"]}
+
+    @property
+    def colunas(self):
+        return list(self.escalas)
+
+    @property
+    def dias(self):
+        return [chunk["dia"] for chunk in self.cabecalho["chunks"]]
+
+    def _chunk_atende(self, chunk, inicio, fim, filtros):
+        if inicio is not None and chunk["t_max"] < inicio:
+            return False
+        if fim is not None and chunk["t_min"] > fim:
+            return False
+        for nome, (minimo, maximo) in filtros.items():
+            _, _, c_min, c_max = chunk["colunas"][nome]
+            if c_min is None:
+                return False
+            if minimo is not None and c_max < minimo:
+                return False
+            if maximo is not None and c_min > maximo:
+                return False
+        return True
+
+    def ler(self, colunas=None, inicio=None, fim=None, filtros=None):
+        # inicio/fim: datetime (inclusivos). filtros: {coluna: (min, max)} usado
+        # para pular blocos pelas estatísticas; as linhas não são filtradas.
+        colunas = self.colunas if colunas is None else list(colunas)
+        filtros = filtros or {}
+        for nome in colunas + list(filtros):
+            if nome == "Timestamp":
+                raise ValueError("Timestamp sempre é retornado; para restringir o período use inicio/fim")
+            if nome not in self.escalas:
+                raise ValueError(f"Coluna desconhecida no arquivo LATC: {nome}")
+        t_inicio = calendar.timegm(inicio.timetuple()) if inicio is not None else None
+        t_fim = calendar.timegm(fim.timetuple()) if fim is not None else None
+
+        resultado = {"Timestamp": []}
+        resultado.update({nome: [] for nome in colunas})
+        with open(self.caminho, "rb") as f:
+            def ler_blob(offset, tamanho):
+                f.seek(self._inicio_dados + offset)
+                return f.read(tamanho)
+
+            for chunk in self.cabecalho["chunks"]:
+                if not self._chunk_atende(chunk, t_inicio, t_fim, filtros):
+                    continue
+                n = chunk["linhas"]
+                epocas = _decodificar_timestamps(ler_blob(*chunk["colunas"]["Timestamp"]), n)
+                a, b = 0, n
+                if t_inicio is not None:
+                    while a < n and epocas[a] < t_inicio:
+                        a += 1
+                if t_fim is not None:
+                    while b > a and epocas[b - 1] > t_fim:
+                        b -= 1
+                resultado["Timestamp"].extend(epocas[a:b])
+                for nome in colunas:
+                    offset, tamanho = chunk["colunas"][nome][:2]
+                    valores = _decodificar_grandeza(ler_blob(offset, tamanho), n, self.escalas[nome])
+                    resultado[nome].extend(valores[a:b])
+        return resultado
+
+    def ler_dia(self, dia, colunas=None):
+        inicio = datetime.combine(dia, datetime.min.time())
+        return self.ler(colunas, inicio, inicio + timedelta(days=1) - timedelta(seconds=1))
+
+
+def epoca_para_datetime(epoca):
+    return EPOCA + timedelta(seconds=epoca)
+
+
+# --- BENCHMARK CONTRA O CARREGAMENTO DO APP ---
+# A referência é o mesmo caminho do supervisório (medicao.carregar_csv, com
+# pandas e a compactação da fase), importado só aqui para o módulo continuar
+# dependendo apenas da biblioteca padrão. O .latc é gravado em `diretorio_saida`
+# ou, se omitido, num diretório temporário descartado ao final.
+def benchmark(caminho_csv, diretorio_saida=None, repeticoes=3):
+    from medicao import carregar_csv, colunas
+
+    with open(caminho_csv, encoding="utf-8", newline="") as f:
+        cabecalho_csv = set(next(csv.reader(f)))
+    colunas_fase = next((c for c in colunas.values() if set(c.values()) <= cabecalho_csv), None)
+
+    def melhor_tempo(funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            t0 = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - t0)
+        return min(tempos)
+
+    temporario = tempfile.TemporaryDirectory() if diretorio_saida is None else None
+    try:
+        diretorio = diretorio_saida if temporario is None else temporario.name
+        caminho_latc = os.path.join(diretorio, os.path.splitext(os.path.basename(caminho_csv))[0] + ".latc")
+        t0 = time.perf_counter()
+        converter_csv(caminho_csv, caminho_latc)
+        t_conversao = time.perf_counter() - t0
+
+        arquivo = ArquivoColunar(caminho_latc)
+        linhas = arquivo.cabecalho["linhas"]
+        coluna = colunas_fase["tensao"] if colunas_fase else arquivo.colunas[0]
+        primeiro_dia = datetime.strptime(arquivo.dias[0], "%Y-%m-%d").date()
+        t_pandas = melhor_tempo(lambda: carregar_csv(caminho_csv, colunas_fase))
+        t_latc = melhor_tempo(lambda: ArquivoColunar(caminho_latc).ler())
+        t_coluna = melhor_tempo(lambda: ArquivoColunar(caminho_latc).ler([coluna]))
+        t_dia = melhor_tempo(lambda: ArquivoColunar(caminho_latc).ler_dia(primeiro_dia))
+        t_dia_coluna = melhor_tempo(lambda: ArquivoColunar(caminho_latc).ler_dia(primeiro_dia, [coluna]))
+        tamanho_latc = os.path.getsize(caminho_latc)
+    finally:
+        if temporario is not None:
+            temporario.cleanup()
+
+    tamanho_csv = os.path.getsize(caminho_csv)
+    return {
+        "arquivo": os.path.basename(caminho_csv),
+        "linhas": linhas,
+        "coluna": coluna,
+        "bytes_csv": tamanho_csv,
+        "bytes_latc": tamanho_latc,
+        "taxa_compressao": tamanho_csv / tamanho_latc if tamanho_latc else math.inf,
+        "conversao_s": t_conversao,
+        "pandas_linhas_por_s": linhas / t_pandas,
+        "latc_linhas_por_s": linhas / t_latc,
+        "latc_coluna_linhas_por_s": linhas / t_coluna,
+        "latc_um_dia_ms": t_dia * 1000,
+        "latc_um_dia_coluna_ms": t_dia_coluna * 1000,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "converter":
+        print(converter_csv(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None))
+    elif len(sys.argv) >= 3 and sys.argv[1] == "benchmark":
+        for caminho in sys.argv[2:]:
+            r = benchmark(caminho)
+            print(f"{r['arquivo']}: {r['linhas']} linhas | CSV {r['bytes_csv']} B -> LATC {r['bytes_latc']} B "
+                  f"({r['taxa_compressao']:.1f}x)\n"
+                  f"  app (pandas, arquivo inteiro): {r['pandas_linhas_por_s']:,.0f} linhas/s\n"
+                  f"  LATC arquivo inteiro:          {r['latc_linhas_por_s']:,.0f} linhas/s\n"
+                  f"  LATC só {r['coluna']}: {r['latc_coluna_linhas_por_s']:,.0f} linhas/s\n"
+                  f"  LATC um dia: {r['latc_um_dia_ms']:.1f} ms | um dia, uma coluna: {r['latc_um_dia_coluna_ms']:.1f} ms")
+    else:
+        print(__doc__ or "uso: python arquivo_colunar.py converter|benchmark <csv> ...")
+        sys.exit(1)
@@ -0,0 +1,185 @@
+# --- INGESTÃO EM NÍVEL DE PROCESSO ---
+# Uma única linha do tempo por processo, independente das sessões do
+# Streamlit: avança uma amostra por fase a cada intervalo, como uma sessão
+# recém-aberta em 1x, e é a única que publica na API de snapshot e alimenta
+# o detector de anomalias. Assim várias abas abertas (cada uma com seu replay,
+# busca e velocidade) não disputam o mesmo snapshot nem treinam o detector com
+# amostras repetidas, e ambos continuam vivos sem navegador aberto.
+# O replay de cada sessão NÃO segue esta linha do tempo; a visão "Ao vivo" do
+# dashboard lê estado() e mostra os mesmos valores servidos pela API.
+import collections
+import os
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from medicao import (colunas, calcular_demanda_maxima, calcular_conta_estimada, limites_dia,
+                     CASAS_DECIMAIS_MEDIDOR)
+
+FASES = ["A", "B", "C"]
+TAMANHO_LOG_ANOMALIAS = 50
+
+
+def arredondar(valor):
+    # Precisão do medidor; as colunas float32 não representam 222.33 exatamente
+    return round(float(valor), CASAS_DECIMAIS_MEDIDOR)
+
+
+class IngestaoProcesso:
+    def __init__(self, dfs, agregados, store, janela_demanda, tarifas, intervalo_s,
+                 detector=None, grandezas_anomalia=None, caminho_estado=None, salvar_a_cada=300):
+        self.dfs = dfs
+        self.agregados = agregados
+        self.store = store
+        self.janela_demanda = janela_demanda
+        self.tarifas = tarifas
+        self.intervalo_s = intervalo_s
+        self._thread = None
+        # O primeiro dia só existe como "dia anterior"; o replay começa no segundo
+        self._k = 1
+        self._i = 0
+        self._trechos = None
+        self._corrente_anterior = {fase: 0.0 for fase in FASES}
+        self.detector = detector
+        self.grandezas_anomalia = grandezas_anomalia or {}
+        # Resolvido agora: a thread grava mesmo que o diretório atual mude depois
+        self.caminho_estado = os.path.abspath(caminho_estado) if caminho_estado else None
+        self.salvar_a_cada = salvar_a_cada
+        self._log_anomalias = collections.deque(maxlen=TAMANHO_LOG_ANOMALIAS)
+        self._lock_log = threading.Lock()
+        # Posição e último snapshot publicado, lidos juntos pela visão "Ao vivo"
+        self._ultimo = None
+        self._lock_estado = threading.Lock()
+
+    def aprender_historico(self):
+        # Linha de base inicial com tudo o que vem antes do primeiro dia do replay
+        if self.detector is None or len(self.agregados["dias"]) < 2:
+            return
+        for fase in FASES:
+            df = self.dfs[fase]
+            fim, _ = limites_dia(df, self.agregados["dias"][1])
+            historico = df.iloc[:fim]
+            for grandeza in self.grandezas_anomalia:
+                col = colunas[fase][grandeza]
+                if col not in historico.columns:
+                    continue
+                for ts, valor in zip(historico["Timestamp"], historico[col]):
+                    if not np.isnan(valor):
+                        self.detector.aprender(f"{fase}.{grandeza}", valor, ts)
+
+    def anomalias(self):
+        with self._lock_log:
+            return list(self._log_anomalias)
+
+    def estado(self):
+        # Último snapshot publicado e a posição que o gerou (dia, amostras do dia já ingeridas)
+        with self._lock_estado:
+            if self._ultimo is None:
+                return None
+            return {"dados": self._ultimo, "indice_dia": self._k,
+                    "dia": self.agregados["dias"][self._k], "amostras": self._i}
+
+    def iniciar(self):
+        if self._thread is None and len(self.agregados["dias"]) >= 2:
+            self._thread = threading.Thread(target=self._executar, name="ingestao_processo", daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while True:
+            inicio = time.perf_counter()
+            try:
+                self.passo()
+            except Exception:
+                traceback.print_exc()
+            time.sleep(max(0.0, self.intervalo_s - (time.perf_counter() - inicio)))
+
+    def _carregar_dia(self):
+        dia = self.agregados["dias"][self._k]
+        self._trechos = {}
+        for fase in FASES:
+            inicio, fim = limites_dia(self.dfs[fase], dia)
+            self._trechos[fase] = self.dfs[fase].iloc[inicio:fim]
+
+    def passo(self):
+        with self._lock_estado:
+            linhas = self._avancar()
+        if linhas is not None:
+            self._detectar_anomalias(linhas)
+        return linhas
+
+    def _avancar(self):
+        if self._trechos is None:
+            self._carregar_dia()
+        if self._i >= min(len(t) for t in self._trechos.values()):
+            self._k += 1
+            if self._k >= len(self.agregados["dias"]):
+                self._k = 1
+            self._i = 0
+            self._carregar_dia()
+            if min(len(t) for t in self._trechos.values()) == 0:
+                return
+
+        i = self._i
+        self._i += 1
+        linhas = {fase: self._trechos[fase].iloc[i] for fase in FASES}
+        for fase in FASES:
+            corrente = linhas[fase][colunas[fase]["corrente"]]
+            if corrente != 0:
+                self._corrente_anterior[fase] = float(corrente)
+        self._publicar(linhas)
+        return linhas
+
+    def _detectar_anomalias(self, linhas):
+        if self.detector is None:
+            return
+        for fase in FASES:
+            timestamp = linhas[fase]["Timestamp"]
+            for grandeza, nome in self.grandezas_anomalia.items():
+                valor = linhas[fase].get(colunas[fase][grandeza], None)
+                if valor is None or np.isnan(valor):
+                    continue
+                motivo = self.detector.atualizar(f"{fase}.{grandeza}", valor, timestamp)
+                if motivo:
+                    with self._lock_log:
+                        self._log_anomalias.append(
+                            f"[{timestamp.strftime('%d/%m/%Y %H:%M:%S')}] ANOMALIA de {nome} na Fase {fase}: "
+                            f"{float(valor):.2f} - {motivo}")
+        if self.caminho_estado and self.detector.amostras_desde_salvo >= self.salvar_a_cada:
+            self.detector.salvar(self.caminho_estado)
+
+    def _publicar(self, linhas):
+        def por_fase(grandeza):
+            return {fase: arredondar(linhas[fase][colunas[fase][grandeza]]) for fase in FASES}
+
+        n = self._i
+        trechos = self._trechos
+        p_total = sum(float(linhas[fase][colunas[fase]["potencia_ativa"]]) for fase in FASES)
+        q_total = sum(float(linhas[fase][colunas[fase]["potencia_reativa"]]) for fase in FASES)
+        s_total = float(np.sqrt(p_total ** 2 + q_total ** 2))
+        fp_total = p_total / s_total if s_total != 0 else 0.0
+        demanda = calcular_demanda_maxima(
+            *(trechos[fase][colunas[fase]["potencia_ativa"]].iloc[:n] for fase in FASES), self.janela_demanda)
+
+        consumo_dia = 0.0
+        if n > 1:
+            consumo_dia = sum(float(trechos[fase][colunas[fase]["consumo"]].iloc[n - 1])
+                              - float(trechos[fase][colunas[fase]["consumo"]].iloc[0]) for fase in FASES)
+        consumo_total = self.agregados["consumo_acumulado"][self._k] + consumo_dia
+
+        self._ultimo = {
+            "timestamp": linhas["A"]["Timestamp"].isoformat(),
+            "tensao": por_fase("tensao"),
+            "corrente": {fase: arredondar(self._corrente_anterior[fase]) for fase in FASES},
+            "potencia_aparente": por_fase("potencia"),
+            "frequencia": por_fase("frequencia"),
+            "fator_de_potencia": por_fase("fator_de_potencia"),
+            "consumo": por_fase("consumo"),
+            "potencia_aparente_total": arredondar(s_total),
+            "fator_de_potencia_total": arredondar(fp_total),
+            "demanda_maxima": arredondar(demanda),
+            "consumo_total": arredondar(consumo_total),
+            "conta_estimada": arredondar(calcular_conta_estimada(consumo_total, self.tarifas)),
+        }
+        self.store.publicar(self._ultimo)
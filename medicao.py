@@ -0,0 +1,187 @@
+# --- LEITURA, COMPACTAÇÃO E CÁLCULOS DE MEDIÇÃO ---
+# Funções e configurações sem dependência do Streamlit, usadas pelo app e
+# pelos testes (que assim verificam as mesmas tarifas e janela do app).
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# --- ARQUIVOS DE MEDIÇÃO (um por fase) ---
+PATHS = {
+    "A": "Planilha_LAT - FASEA.csv",
+    "B": "Planilha_LAT - FASEB.csv",
+    "C": "Planilha_LAT - FASEC.csv"
+}
+
+# --- DEMANDA ---
+demand_window = 5 # 5 pontos de 3min = 15 minutos
+
+# --- TARIFAS BRASILEIRAS (EXEMPLO) ---
+TARIFAS = {
+    "TE": 0.60, # Tarifa de Energia (R$/kWh)
+    "TUSD": 0.40, # Tarifa de Uso do Sistema de Distribuição (R$/kWh)
+    "ICMS": 0.25, # Imposto sobre Circulação de Mercadorias e Serviços (%)
+    "PIS": 0.0165, # Programa de Integração Social (%)
+    "COFINS": 0.076, # Contribuição para o Financiamento da Seguridade Social (%)
+    "BANDEIRAS": {
+        "Verde": 0.00,
+        "Amarela": 0.02, # Exemplo de custo extra por kWh
+        "Vermelha 1": 0.05,
+        "Vermelha 2": 0.08,
+    }
+}
+
+# --- NOMES DAS COLUNAS POR FASE ---
+colunas = {
+    "A": {
+        "tensao": "Tensao_Fase_A",
+        "corrente": "Corrente_Fase_A",
+        "potencia": "Potencia_Aparente_Fase_A",
+        "frequencia": "Frequencia_Fase_A",
+        "fator_de_potencia": "fator_De_Potencia_Fase_A",
+        "consumo": "C (kWh)",
+        "potencia_ativa": "Potencia_Ativa_Fase_A",
+        "potencia_reativa": "Potencia_Reativa_Fase_A"
+    },
+    "B": {
+        "tensao": "Tensao_Fase_B",
+        "corrente": "Corrente_Fase_B",
+        "potencia": "Potencia_Aparente_Fase_B",
+        "frequencia": "Frequencia_Fase_B",
+        "fator_de_potencia": "fator_De_Potencia_Fase_B",
+        "consumo": "C (kWh)",
+        "potencia_ativa": "Potencia_Ativa_Fase_B",
+        "potencia_reativa": "Potencia_Reativa_Fase_B"
+    },
+    "C": {
+        "tensao": "Tensao_Fase_C",
+        "corrente": "Corrente_Fase_C",
+        "potencia": "Potencia_Aparente_Fase_C",
+        "frequencia": "Frequencia_Fase_C",
+        "fator_de_potencia": "fator_De_Potencia_Fase_C",
+        "consumo": "C (kWh)",
+        "potencia_ativa": "Potencia_Ativa_Fase_C",
+        "potencia_reativa": "Potencia_Reativa_Fase_C"
+    }
+}
+
+# --- REPRESENTAÇÃO COMPACTA EM MEMÓRIA ---
+# Descarta "Data"/"Horário" (já contidos em "Timestamp", que é int64 internamente)
+# e as colunas que o app não usa. Grandezas medidas com 2 casas decimais cabem
+# em float32 sem perda visível; o consumo acumulado (kWh) fica em float64 porque
+# alimenta o cálculo da conta.
+GRANDEZAS_FLOAT32 = ["tensao", "corrente", "potencia", "frequencia",
+                     "fator_de_potencia", "potencia_ativa", "potencia_reativa"]
+CASAS_DECIMAIS_MEDIDOR = 2
+
+def bytes_por_linha(df):
+    if df.empty:
+        return 0.0
+    return df.memory_usage(index=True, deep=True).sum() / len(df)
+
+def compactar_df(df, colunas_fase):
+    usadas = ["Timestamp"] + [c for c in dict.fromkeys(colunas_fase.values()) if c in df.columns]
+    df = df[usadas].copy()
+    for chave in GRANDEZAS_FLOAT32:
+        col = colunas_fase.get(chave)
+        if col in df.columns and df[col].dtype == np.float64:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+# --- LEITURA E LIMPEZA ---
+def carregar_csv(path, colunas_fase=None, compacto=True):
+    relatorio = {"antes": 0.0, "depois": 0.0, "linhas": 0}
+    df = pd.read_csv(path)
+    
+    if df.empty:
+        return pd.DataFrame(), relatorio
+        
+    for col in df.columns:
+        if col in ["Data", "Horário"]:
+            continue
+        df[col] = df[col].astype(str).str.replace(",", ".", regex=False)
+        try:
+            df[col] = df[col].astype(float)
+        except ValueError:
+            pass
+    df['Timestamp'] = pd.to_datetime(df['Data'] + ' ' + df['Horário'], format='%d/%m/%Y %H:%M:%S')
+    df = df.sort_values(by='Timestamp').reset_index(drop=True)
+
+    relatorio["linhas"] = len(df)
+    relatorio["antes"] = bytes_por_linha(df)
+    if compacto and colunas_fase:
+        df = compactar_df(df, colunas_fase)
+    relatorio["depois"] = bytes_por_linha(df)
+    return df, relatorio
+
+# --- CONSUMO, DEMANDA E CONTA ---
+def calcular_consumo_diario(df_A, df_B, df_C):
+    if df_A.empty or df_B.empty or df_C.empty or 'C (kWh)' not in df_A.columns:
+        return 0.0
+    
+    consumo_A = df_A['C (kWh)'].iloc[-1] - df_A['C (kWh)'].iloc[0]
+    consumo_B = df_B['C (kWh)'].iloc[-1] - df_B['C (kWh)'].iloc[0]
+    consumo_C = df_C['C (kWh)'].iloc[-1] - df_C['C (kWh)'].iloc[0]
+    
+    return consumo_A + consumo_B + consumo_C
+
+def calcular_demanda_maxima(potencias_A, potencias_B, potencias_C, janela):
+    # Maior média móvel da potência ativa total; soma em float64 para não
+    # acumular o arredondamento das colunas float32
+    min_len = min(len(potencias_A), len(potencias_B), len(potencias_C))
+    if min_len < janela:
+        return 0.0
+    total = (np.asarray(potencias_A, dtype=float)[:min_len]
+             + np.asarray(potencias_B, dtype=float)[:min_len]
+             + np.asarray(potencias_C, dtype=float)[:min_len])
+    return float(pd.Series(total).rolling(window=janela).mean().max())
+
+def calcular_conta_estimada(consumo_kwh, tarifas, bandeira="Verde"):
+    custo_base = consumo_kwh * (tarifas["TE"] + tarifas["TUSD"] + tarifas["BANDEIRAS"][bandeira])
+    impostos = custo_base * (tarifas["ICMS"] + tarifas["PIS"] + tarifas["COFINS"])
+    return custo_base + impostos
+
+# --- LIMITES DE UM DIA POR BUSCA BINÁRIA (os dataframes estão ordenados por Timestamp) ---
+def limites_dia(df, dia):
+    ts = df["Timestamp"].values
+    inicio = np.datetime64(datetime.combine(dia, datetime.min.time()))
+    return (int(np.searchsorted(ts, inicio, side="left")),
+            int(np.searchsorted(ts, inicio + np.timedelta64(1, "D"), side="left")))
+
+# --- AGREGADOS DIÁRIOS (consumo, demanda e o estado do replay ao entrar em cada dia) ---
+def calcular_agregados_diarios(dfs, janela):
+    agregados = {"dias": [], "consumo_diario": {}, "demanda_diaria": {}, "consumo_inicial": 0.0,
+                 "consumo_acumulado": [], "demanda_historica": []}
+    if any(dfs[fase].empty for fase in ["A", "B", "C"]):
+        return agregados
+
+    dias = sorted(dfs["A"]["Timestamp"].dt.date.unique())
+    for dia in dias:
+        trechos = []
+        for fase in ["A", "B", "C"]:
+            inicio, fim = limites_dia(dfs[fase], dia)
+            trechos.append(dfs[fase].iloc[inicio:fim])
+        agregados["consumo_diario"][dia] = calcular_consumo_diario(*trechos)
+
+        agregados["demanda_diaria"][dia] = calcular_demanda_maxima(
+            *(t[colunas[fase]["potencia_ativa"]] for t, fase in zip(trechos, ["A", "B", "C"])), janela)
+
+    inicio_trechos = [limites_dia(dfs[fase], dias[0]) for fase in ["A", "B", "C"]]
+    if all(fim > inicio for inicio, fim in inicio_trechos):
+        agregados["consumo_inicial"] = float(sum(
+            dfs[fase]['C (kWh)'].iloc[fim - 1] for (inicio, fim), fase in zip(inicio_trechos, ["A", "B", "C"])))
+
+    # Estado que o replay sequencial teria ao entrar no dia k (dia_atual = dias[k]):
+    # o acumulado soma o consumo do "dia anterior" a cada virada, a partir do segundo dia.
+    consumo = agregados["consumo_inicial"]
+    demanda_max, dia_max = 0.0, ""
+    for k, dia in enumerate(dias):
+        if k >= 2:
+            consumo += agregados["consumo_diario"][dias[k - 2]]
+        if k >= 2 and agregados["demanda_diaria"][dias[k - 1]] > demanda_max:
+            demanda_max, dia_max = agregados["demanda_diaria"][dias[k - 1]], dias[k - 1].strftime('%d/%m/%Y')
+        agregados["consumo_acumulado"].append(consumo)
+        agregados["demanda_historica"].append((demanda_max, dia_max))
+
+    agregados["dias"] = dias
+    return agregados
@@ -0,0 +1,172 @@
+# --- API JSON DE SNAPSHOT / DELTA PARA IHMs E PAINÉIS EXTERNOS ---
+# Servidor HTTP local (somente biblioteca padrão) que expõe os mesmos valores
+# mostrados nos visores do supervisório. Quem publica é a ingestão em nível
+# de processo (ingestao.py), uma vez por amostra; o servidor só devolve bytes
+# já serializados, então cada requisição de polling custa praticamente nada.
+#
+#   GET /snapshot                       -> snapshot completo (ETag = instância-sequência, 304 com If-None-Match)
+#   GET /delta?desde=N&instancia=ID     -> apenas os campos que mudaram desde a sequência N
+#   GET /eventos                        -> server-sent events com cada novo snapshot
+#
+# "instancia" muda a cada início do processo; como a sequência recomeça do
+# zero, o cliente que guardou (instancia, seq) de outra execução recebe o
+# snapshot completo em vez de um 304 indevido.
+import collections
+import json
+import math
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+HISTORICO_DELTAS = 256       # quantas versões anteriores ficam disponíveis para /delta
+SSE_KEEPALIVE_S = 15.0       # intervalo do comentário de keep-alive no /eventos
+
+
+class SnapshotStore:
+    def __init__(self, historico=HISTORICO_DELTAS):
+        self._cond = threading.Condition()
+        self.instancia = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._snapshot = {}
+        self._snapshot_bytes = self._serializar({"instancia": self.instancia, "seq": 0, "dados": {}})
+        # Cada item: (seq, chaves alteradas nessa versão)
+        self._alteracoes = collections.deque(maxlen=historico)
+
+    @staticmethod
+    def _sem_nan(obj):
+        # NaN/infinito não são JSON válido: viram null
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {k: SnapshotStore._sem_nan(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [SnapshotStore._sem_nan(v) for v in obj]
+        return obj
+
+    @staticmethod
+    def _serializar(obj):
+        return json.dumps(SnapshotStore._sem_nan(obj), ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+    @property
+    def etag(self):
+        return f'"{self.instancia}-{self._seq}"'
+
+    def publicar(self, dados):
+        dados = self._sem_nan(dados)
+        with self._cond:
+            alteradas = [k for k, v in dados.items() if self._snapshot.get(k) != v]
+            alteradas += [k for k in self._snapshot if k not in dados]
+            if not alteradas:
+                return self._seq
+            self._seq += 1
+            self._snapshot = dict(dados)
+            self._snapshot_bytes = self._serializar({"instancia": self.instancia, "seq": self._seq, "dados": self._snapshot})
+            self._alteracoes.append((self._seq, alteradas))
+            self._cond.notify_all()
+            return self._seq
+
+    def snapshot(self):
+        with self._cond:
+            return self.etag, self._snapshot_bytes
+
+    def delta(self, desde, instancia=None):
+        with self._cond:
+            seq = self._seq
+            outra_execucao = instancia is not None and instancia != self.instancia
+            if desde == seq and not outra_execucao:
+                return self.etag, None
+            mais_antiga = self._alteracoes[0][0] if self._alteracoes else seq + 1
+            if outra_execucao or desde > seq or desde < mais_antiga - 1:
+                # Cliente de outra execução, à frente ou atrasado demais: snapshot completo
+                return self.etag, self._serializar({"instancia": self.instancia, "seq": seq, "desde": desde,
+                                                    "completo": True, "dados": self._snapshot})
+            chaves = set()
+            for s, alteradas in self._alteracoes:
+                if s > desde:
+                    chaves.update(alteradas)
+            dados = {k: self._snapshot.get(k) for k in chaves}
+            return self.etag, self._serializar({"instancia": self.instancia, "seq": seq, "desde": desde,
+                                                "completo": False, "dados": dados})
+
+    def aguardar(self, apos_seq, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > apos_seq, timeout=timeout)
+            return self._seq, self._snapshot_bytes
+
+
+def _criar_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _responder(self, status, corpo=b"", etag=None, tipo="application/json; charset=utf-8"):
+            self.send_response(status)
+            if etag is not None:
+                self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if status != 304:
+                self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            if corpo:
+                self.wfile.write(corpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/snapshot":
+                etag, corpo = store.snapshot()
+                if self.headers.get("If-None-Match") == etag:
+                    self._responder(304, etag=etag)
+                else:
+                    self._responder(200, corpo, etag=etag)
+            elif url.path == "/delta":
+                parametros = parse_qs(url.query)
+                try:
+                    desde = int(parametros.get("desde", ["0"])[0])
+                except ValueError:
+                    self._responder(400, b'{"erro":"parametro desde invalido"}')
+                    return
+                etag, corpo = store.delta(desde, parametros.get("instancia", [None])[0])
+                if corpo is None:
+                    self._responder(304, etag=etag)
+                else:
+                    self._responder(200, corpo, etag=etag)
+            elif url.path == "/eventos":
+                self._eventos()
+            else:
+                self._responder(404, b'{"erro":"rota desconhecida"}')
+
+        def _eventos(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            ultimo = -1
+            try:
+                while True:
+                    seq, corpo = store.aguardar(ultimo, SSE_KEEPALIVE_S)
+                    if seq == ultimo:
+                        self.wfile.write(b": keep-alive\n\n")
+                    else:
+                        self.wfile.write(f"id: {store.instancia}-{seq}\ndata: ".encode() + corpo + b"\n\n")
+                        ultimo = seq
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def iniciar_servidor(store, host, porta):
+    servidor = ThreadingHTTPServer((host, porta), _criar_handler(store))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="snapshot_api", daemon=True).start()
+    return servidor
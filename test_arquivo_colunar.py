@@ -0,0 +1,112 @@
+import math
+from datetime import date, datetime
+
+import pytest
+
+import arquivo_colunar
+from arquivo_colunar import ArquivoColunar, converter_csv, epoca_para_datetime
+from medicao import PATHS, carregar_csv
+
+AMOSTRAS_POR_DIA = 480  # uma a cada 3 minutos
+
+
+@pytest.fixture(scope="module")
+def arquivos(tmp_path_factory):
+    diretorio = tmp_path_factory.mktemp("latc")
+    resultado = {}
+    for fase, path in PATHS.items():
+        caminho = converter_csv(path, str(diretorio / f"fase{fase}.latc"))
+        resultado[fase] = (ArquivoColunar(caminho), carregar_csv(path, compacto=False)[0])
+    return resultado
+
+
+@pytest.fixture
+def chunks_lidos(monkeypatch):
+    # Conta os blocos descomprimidos (um Timestamp decodificado por bloco)
+    contador = {"n": 0}
+    original = arquivo_colunar._decodificar_timestamps
+
+    def contar(blob, quantidade):
+        contador["n"] += 1
+        return original(blob, quantidade)
+
+    monkeypatch.setattr(arquivo_colunar, "_decodificar_timestamps", contar)
+    return contador
+
+
+def test_ida_e_volta_sem_perda(arquivos):
+    for arquivo, df in arquivos.values():
+        dados = arquivo.ler()
+        assert arquivo.cabecalho["linhas"] == len(df)
+        assert [epoca_para_datetime(e) for e in dados["Timestamp"]] == list(df["Timestamp"])
+        assert set(arquivo.colunas) == set(df.columns) - {"Data", "Horário", "Timestamp"}
+        for nome in arquivo.colunas:
+            assert dados[nome] == df[nome].tolist(), nome
+
+
+def test_ler_dia_devolve_so_o_dia(arquivos):
+    arquivo, df = arquivos["A"]
+    datas = df["Timestamp"].dt.date
+    for dia_iso in arquivo.dias:
+        dia = date.fromisoformat(dia_iso)
+        dados = arquivo.ler_dia(dia, ["Tensao_Fase_A"])
+        esperado = df[datas == dia]
+        assert len(dados["Timestamp"]) == AMOSTRAS_POR_DIA
+        assert [epoca_para_datetime(e) for e in dados["Timestamp"]] == list(esperado["Timestamp"])
+        assert dados["Tensao_Fase_A"] == esperado["Tensao_Fase_A"].tolist()
+
+
+def test_periodo_pula_blocos(arquivos, chunks_lidos):
+    arquivo, _ = arquivos["A"]
+    dados = arquivo.ler(["Tensao_Fase_A"], datetime(2025, 8, 10, 12, 0), datetime(2025, 8, 11, 11, 57))
+    assert chunks_lidos["n"] == 2
+    assert len(dados["Timestamp"]) == AMOSTRAS_POR_DIA
+    assert epoca_para_datetime(dados["Timestamp"][0]) == datetime(2025, 8, 10, 12, 0)
+
+    chunks_lidos["n"] = 0
+    assert arquivo.ler(["Tensao_Fase_A"], inicio=datetime(2026, 1, 1)) == {"Timestamp": [], "Tensao_Fase_A": []}
+    assert chunks_lidos["n"] == 0
+
+
+def test_filtros_pulam_blocos(arquivos, chunks_lidos):
+    arquivo, df = arquivos["A"]
+    coluna = "Tensao_Fase_A"
+    # Limite entre o maior e o segundo maior máximo diário: só o bloco do pico atende
+    maximos = sorted((chunk["colunas"][coluna][3], chunk["dia"]) for chunk in arquivo.cabecalho["chunks"])
+    limite = (maximos[-1][0] + maximos[-2][0]) / 2
+    dados = arquivo.ler([coluna], filtros={coluna: (limite, None)})
+    assert chunks_lidos["n"] == 1
+    assert len(dados["Timestamp"]) == AMOSTRAS_POR_DIA
+    assert epoca_para_datetime(dados["Timestamp"][0]).date().isoformat() == maximos[-1][1]
+    assert max(dados[coluna]) == df[coluna].max()
+
+    chunks_lidos["n"] = 0
+    assert arquivo.ler([coluna], filtros={coluna: (None, 0.0)}) == {"Timestamp": [], coluna: []}
+    assert chunks_lidos["n"] == 0
+
+
+def test_celulas_vazias_voltam_como_none(tmp_path):
+    csv = tmp_path / "vazias.csv"
+    csv.write_text(
+        "Data,Horário,Tensao_Fase_A,C (kWh)\n"
+        '01/08/2025,00:00:00,"222,33","0,76"\n'
+        '01/08/2025,00:03:00,,"1,58"\n'
+        '01/08/2025,00:06:00,"223,80",\n',
+        encoding="utf-8")
+    arquivo = ArquivoColunar(converter_csv(str(csv), str(tmp_path / "vazias.latc")))
+    dados = arquivo.ler()
+    assert dados["Tensao_Fase_A"] == [222.33, None, 223.8]
+    assert dados["C (kWh)"] == [0.76, 1.58, None]
+
+    df = carregar_csv(str(csv), compacto=False)[0]
+    assert math.isnan(df["Tensao_Fase_A"].iloc[1]) and math.isnan(df["C (kWh)"].iloc[2])
+
+
+def test_coluna_desconhecida_gera_value_error(arquivos):
+    arquivo, _ = arquivos["A"]
+    with pytest.raises(ValueError, match="Timestamp"):
+        arquivo.ler(["Timestamp"])
+    with pytest.raises(ValueError, match="Tensao_Fase_Z"):
+        arquivo.ler(["Tensao_Fase_Z"])
+    with pytest.raises(ValueError, match="Tensao_Fase_Z"):
+        arquivo.ler(filtros={"Tensao_Fase_Z": (0, 1)})
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from ingestao import IngestaoProcesso
+from medicao import (PATHS, TARIFAS, demand_window, colunas, carregar_csv, calcular_agregados_diarios,
+                     limites_dia)
+from snapshot_api import SnapshotStore
+
+
+@pytest.fixture(scope="module")
+def dfs():
+    return {fase: carregar_csv(path, colunas[fase])[0] for fase, path in PATHS.items()}
+
+
+def valores_numericos(obj):
+    if isinstance(obj, dict):
+        for v in obj.values():
+            yield from valores_numericos(v)
+    elif isinstance(obj, float):
+        yield obj
+
+
+def test_snapshot_publicado_na_precisao_do_medidor(dfs):
+    agregados = calcular_agregados_diarios(dfs, demand_window)
+    store = SnapshotStore()
+    ingestao = IngestaoProcesso(dfs, agregados, store, demand_window, TARIFAS, intervalo_s=0.5)
+    for _ in range(10):
+        ingestao.passo()
+
+    dados = json.loads(store.snapshot()[1].decode("utf-8"))["dados"]
+    for valor in valores_numericos(dados):
+        assert valor == round(valor, 2)
+
+    # Sem os artefatos do float32 (222.14999389648438): igual ao texto do CSV
+    completo = carregar_csv(PATHS["A"], colunas["A"], compacto=False)[0]
+    inicio, _ = limites_dia(completo, agregados["dias"][1])
+    linha = completo.iloc[inicio + 9]
+    assert dados["timestamp"] == linha["Timestamp"].isoformat()
+    assert dados["tensao"]["A"] == linha[colunas["A"]["tensao"]]
+    assert dados["frequencia"]["A"] == linha[colunas["A"]["frequencia"]]
@@ -0,0 +1,77 @@
+import pytest
+
+from medicao import (PATHS, TARIFAS, demand_window, colunas, carregar_csv, calcular_consumo_diario,
+                     calcular_demanda_maxima, calcular_conta_estimada, CASAS_DECIMAIS_MEDIDOR)
+
+TOLERANCIA_DEMANDA = 1e-6  # relativa
+TOLERANCIA_CONTA = 1e-9    # relativa
+
+
+@pytest.fixture(scope="module")
+def dfs():
+    return {
+        compacto: {fase: carregar_csv(path, colunas[fase], compacto)[0] for fase, path in PATHS.items()}
+        for compacto in (False, True)
+    }
+
+
+def trechos_por_dia(dfs_modo):
+    datas = {fase: df["Timestamp"].dt.date for fase, df in dfs_modo.items()}
+    for dia in sorted(datas["A"].unique()):
+        yield dia, [dfs_modo[fase][datas[fase] == dia] for fase in ["A", "B", "C"]]
+
+
+def test_modo_compacto_descarta_colunas_e_reduz_memoria():
+    completo, rel_completo = carregar_csv(PATHS["A"], colunas["A"], compacto=False)
+    compacto, rel_compacto = carregar_csv(PATHS["A"], colunas["A"], compacto=True)
+
+    assert "Data" not in compacto.columns and "Horário" not in compacto.columns
+    assert set(compacto.columns) == {"Timestamp"} | set(colunas["A"].values())
+    assert compacto[colunas["A"]["tensao"]].dtype == "float32"
+    assert compacto[colunas["A"]["consumo"]].dtype == "float64"
+    assert rel_completo["antes"] == rel_completo["depois"]
+    assert rel_compacto["depois"] < rel_compacto["antes"] / 2
+    assert (compacto["Timestamp"] == completo["Timestamp"]).all()
+
+
+def test_grandezas_float32_dentro_da_precisao_do_medidor(dfs):
+    for fase in ["A", "B", "C"]:
+        for col in colunas[fase].values():
+            diferenca = (dfs[True][fase][col].astype(float) - dfs[False][fase][col]).abs().max()
+            assert diferenca < 0.5 * 10 ** -CASAS_DECIMAIS_MEDIDOR
+
+
+def test_demanda_diaria_igual_no_modo_compacto(dfs):
+    compactos = dict(trechos_por_dia(dfs[True]))
+    for dia, trechos in trechos_por_dia(dfs[False]):
+        esperada = calcular_demanda_maxima(
+            *(t[colunas[fase]["potencia_ativa"]] for t, fase in zip(trechos, ["A", "B", "C"])), demand_window)
+        obtida = calcular_demanda_maxima(
+            *(t[colunas[fase]["potencia_ativa"]] for t, fase in zip(compactos[dia], ["A", "B", "C"])), demand_window)
+        # Caminho do "Dia Atual": listas de float() montadas amostra a amostra na sessão
+        em_listas = calcular_demanda_maxima(
+            *([float(v) for v in t[colunas[fase]["potencia_ativa"]]] for t, fase in zip(compactos[dia], ["A", "B", "C"])),
+            demand_window)
+        assert esperada > 0
+        assert obtida == pytest.approx(esperada, rel=TOLERANCIA_DEMANDA)
+        assert em_listas == pytest.approx(esperada, rel=TOLERANCIA_DEMANDA)
+
+
+def test_consumo_e_conta_iguais_no_modo_compacto(dfs):
+    consumo = {}
+    for compacto in (False, True):
+        consumo[compacto] = sum(calcular_consumo_diario(*trechos) for _, trechos in trechos_por_dia(dfs[compacto]))
+    assert consumo[False] > 0
+    assert consumo[True] == consumo[False]
+    assert calcular_conta_estimada(consumo[True], TARIFAS) == pytest.approx(
+        calcular_conta_estimada(consumo[False], TARIFAS), rel=TOLERANCIA_CONTA)
+
+
+def test_demanda_sem_amostras_suficientes_e_zero():
+    assert calcular_demanda_maxima([1.0] * 4, [1.0] * 4, [1.0] * 4, demand_window) == 0.0
+    assert calcular_demanda_maxima([], [], [], demand_window) == 0.0
+
+
+def test_conta_estimada():
+    # 100 kWh * R$ 1,00 + impostos (25% + 1,65% + 7,6%)
+    assert calcular_conta_estimada(100.0, TARIFAS) == pytest.approx(134.25)
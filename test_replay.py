@@ -0,0 +1,47 @@
+import os
+from datetime import date, datetime, time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from medicao import PATHS, colunas, carregar_csv
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # O app lê os arquivos pelo caminho relativo e grava o estado do detector no
+    # diretório atual: roda num diretório temporário com links para os dados
+    for nome in list(PATHS.values()) + ["FDJ_engenharia.jpg"]:
+        os.symlink(os.path.join(DIRETORIO, nome), tmp_path / nome)
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(os.path.join(DIRETORIO, "app.py"), default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def ultima_amostra_ate(instante):
+    df = carregar_csv(PATHS["A"], colunas["A"])[0]
+    return df.loc[df["Timestamp"] <= instante, "Timestamp"].iloc[-1]
+
+
+@pytest.mark.parametrize("velocidade", ["1x", "100x"])
+@pytest.mark.parametrize("horario", [time(10, 0), time(10, 1)])
+def test_busca_para_no_instante_pedido(app, velocidade, horario):
+    app.select_slider(key="replay_velocidade").set_value(velocidade)
+    app.date_input(key="replay_data").set_value(date(2025, 8, 15))
+    app.time_input(key="replay_hora").set_value(horario)
+    app.button[[b.label for b in app.button].index("Ir para o instante")].click()
+    app.run()
+    assert not app.exception
+
+    esperado = ultima_amostra_ate(datetime.combine(date(2025, 8, 15), horario))
+    for fase in ["A", "B", "C"]:
+        assert app.session_state[f"valores_{fase}"]["timestamp"][-1] == esperado
+    assert app.session_state["index_A"] == 201
+
+    # A execução seguinte volta a avançar na velocidade escolhida
+    app.run()
+    assert len(app.session_state["valores_A"]["timestamp"]) == 201 + int(velocidade[:-1])
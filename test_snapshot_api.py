@@ -0,0 +1,147 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from snapshot_api import SnapshotStore, iniciar_servidor
+
+
+def decodificar(corpo):
+    return json.loads(corpo.decode("utf-8"))
+
+
+def test_delta_so_com_campos_alterados():
+    store = SnapshotStore()
+    store.publicar({"tensao": {"A": 220.0}, "corrente": {"A": 80.0}})
+    store.publicar({"tensao": {"A": 221.0}, "corrente": {"A": 80.0}})
+
+    etag, corpo = store.delta(1, store.instancia)
+    dados = decodificar(corpo)
+    assert etag == f'"{store.instancia}-2"'
+    assert dados["completo"] is False
+    assert dados["dados"] == {"tensao": {"A": 221.0}}
+
+
+def test_delta_atualizado_nao_tem_corpo():
+    store = SnapshotStore()
+    store.publicar({"tensao": {"A": 220.0}})
+    assert store.delta(1, store.instancia)[1] is None
+    assert store.delta(1)[1] is None
+
+
+def test_publicacao_identica_nao_avanca_sequencia():
+    store = SnapshotStore()
+    store.publicar({"tensao": {"A": 220.0}})
+    store.publicar({"tensao": {"A": 220.0}})
+    assert decodificar(store.snapshot()[1])["seq"] == 1
+
+
+def test_cliente_de_outra_execucao_recebe_snapshot_completo():
+    store = SnapshotStore()
+    store.publicar({"tensao": {"A": 220.0}})
+    store.publicar({"tensao": {"A": 221.0}})
+
+    # Sequência guardada de uma execução anterior, à frente da atual
+    dados = decodificar(store.delta(5000)[1])
+    assert dados["completo"] is True
+    assert dados["instancia"] == store.instancia
+    assert dados["dados"] == {"tensao": {"A": 221.0}}
+
+    # Mesma sequência, mas de outra instância
+    dados = decodificar(store.delta(2, "outra")[1])
+    assert dados["completo"] is True
+
+
+def test_historico_esgotado_recebe_snapshot_completo():
+    store = SnapshotStore(historico=2)
+    for i in range(5):
+        store.publicar({"tensao": {"A": 220.0 + i}})
+    assert decodificar(store.delta(1, store.instancia)[1])["completo"] is True
+    assert decodificar(store.delta(3, store.instancia)[1])["completo"] is False
+
+
+def test_etag_muda_entre_instancias():
+    assert SnapshotStore().snapshot()[0] != SnapshotStore().snapshot()[0]
+
+
+def test_nan_vira_null():
+    store = SnapshotStore()
+    store.publicar({"demanda_maxima": float("nan"), "tensao": {"A": float("inf")}})
+    dados = decodificar(store.snapshot()[1])
+    assert dados["dados"] == {"demanda_maxima": None, "tensao": {"A": None}}
+
+
+# --- CAMADA HTTP ---
+@pytest.fixture
+def servidor():
+    store = SnapshotStore()
+    store.publicar({"tensao": {"A": 220.0}, "corrente": {"A": 80.0}})
+    store.publicar({"tensao": {"A": 221.0}, "corrente": {"A": 80.0}})
+    servidor = iniciar_servidor(store, "127.0.0.1", 0)
+    yield store, f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def requisitar(url, cabecalhos=None):
+    # Retorna (status, cabeçalhos, corpo) também para 304/4xx
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=cabecalhos or {}), timeout=5) as resposta:
+            return resposta.status, resposta.headers, resposta.read()
+    except urllib.error.HTTPError as erro:
+        return erro.code, erro.headers, erro.read()
+
+
+def test_http_snapshot_e_304_com_if_none_match(servidor):
+    store, base = servidor
+    status, cabecalhos, corpo = requisitar(base + "/snapshot")
+    assert status == 200
+    assert cabecalhos["ETag"] == f'"{store.instancia}-2"'
+    assert cabecalhos["Content-Type"].startswith("application/json")
+    assert decodificar(corpo)["dados"] == {"tensao": {"A": 221.0}, "corrente": {"A": 80.0}}
+
+    status, _, corpo = requisitar(base + "/snapshot", {"If-None-Match": cabecalhos["ETag"]})
+    assert (status, corpo) == (304, b"")
+
+    # ETag de outra execução não vale
+    status, _, _ = requisitar(base + "/snapshot", {"If-None-Match": '"outra-2"'})
+    assert status == 200
+
+
+def test_http_delta(servidor):
+    store, base = servidor
+    status, _, corpo = requisitar(f"{base}/delta?desde=1&instancia={store.instancia}")
+    assert status == 200
+    assert decodificar(corpo)["dados"] == {"tensao": {"A": 221.0}}
+
+    status, cabecalhos, corpo = requisitar(f"{base}/delta?desde=2&instancia={store.instancia}")
+    assert (status, corpo) == (304, b"")
+    assert cabecalhos["ETag"] == f'"{store.instancia}-2"'
+
+    status, _, corpo = requisitar(base + "/delta?desde=abc")
+    assert status == 400
+    assert "erro" in decodificar(corpo)
+
+
+def test_http_rota_desconhecida(servidor):
+    _, base = servidor
+    status, _, corpo = requisitar(base + "/nada")
+    assert status == 404
+    assert "erro" in decodificar(corpo)
+
+
+def test_http_eventos_sse(servidor):
+    store, base = servidor
+    with urllib.request.urlopen(base + "/eventos", timeout=5) as resposta:
+        assert resposta.headers["Content-Type"] == "text/event-stream"
+        # Primeiro evento: snapshot atual; o seguinte chega a cada publicação
+        assert resposta.readline() == f"id: {store.instancia}-2\n".encode()
+        linha = resposta.readline()
+        assert linha.startswith(b"data: ")
+        assert decodificar(linha[len(b"data: "):])["dados"]["tensao"] == {"A": 221.0}
+        assert resposta.readline() == b"\n"
+
+        store.publicar({"tensao": {"A": 222.0}, "corrente": {"A": 80.0}})
+        assert resposta.readline() == f"id: {store.instancia}-3\n".encode()
+        assert decodificar(resposta.readline()[len(b"data: "):])["seq"] == 3